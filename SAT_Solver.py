@@ -2,22 +2,95 @@
 
 # Press ⌃R to execute it or replace it with your code.
 # Press Double ⇧ to search everywhere for classes, files, tool windows, actions, and settings.
+from array import array
+import bz2
+import gzip
+import hashlib
+import lzma
+import mmap
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+### Clause storage
+
+class ClauseArena(object):
+    """A clause database stored flat: the literals of all clauses are kept
+    back to back in a single array('i'), and clause i is the slice of
+    length lengths[i] beginning at starts[i].  This takes 4 bytes per
+    literal, rather than a Python object per literal and per clause, and
+    keeps the literals of a clause contiguous in memory."""
+
+    __slots__ = ("lits", "starts", "lengths")
+
+    def __init__(self):
+        self.lits = array("i")
+        self.starts = array("q")
+        self.lengths = array("i")
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __iter__(self):
+        for i in range(len(self.lengths)):
+            yield self.literals(i)
+
+    def add(self, literals):
+        """Appends a clause, and returns its index."""
+        self.starts.append(len(self.lits))
+        self.lits.extend(literals)
+        self.lengths.append(len(self.lits) - self.starts[-1])
+        return len(self.lengths) - 1
+
+    def literals(self, i):
+        """Returns the literals of clause i, as an array."""
+        start = self.starts[i]
+        return self.lits[start:start + self.lengths[i]]
+
+
 ### Defining Clauses
 
 class Clause(object):
+    """A clause, as a lightweight handle onto a clause in a ClauseArena."""
+
+    __slots__ = ("arena", "index")
 
     def __init__(self, clause):
         """Initializes a clause.  Here, the input clause is either a list or set
         of integers, or is an instance of Clause; in the latter case, a shallow
-        copy is made, so that one can modify this clause without modifying the
-        original clause.
-        Store the list of literals as a frozenset."""
-        # YOUR CODE HERE
+        copy is made, which refers to the same storage.  Repeated literals
+        are stored only once."""
         if isinstance(clause, Clause):
-            self.literals = clause.literals
+            self.arena = clause.arena
+            self.index = clause.index
         else:
-            self.literals = frozenset(clause)
-        self.clause = clause
+            self.arena = ClauseArena()
+            self.index = self.arena.add(dict.fromkeys(clause))
+
+    @classmethod
+    def view(cls, arena, index):
+        """Returns a Clause referring to clause index of arena, without
+        copying it."""
+        c = cls.__new__(cls)
+        c.arena = arena
+        c.index = index
+        return c
+
+    @property
+    def clause(self):
+        """The literals of the clause, as a list."""
+        return self.arena.literals(self.index).tolist()
+
+    @property
+    def literals(self):
+        """The literals of the clause, as a frozenset."""
+        return frozenset(self.arena.literals(self.index))
 
     def __repr__(self):
         return repr(self.literals)
@@ -31,46 +104,31 @@ class Clause(object):
         return hash(self.literals)
 
     def __len__(self):
-        return len(self.literals)
+        return self.arena.lengths[self.index]
 
     @property
     def istrue(self):
         """A clause is true if it contains both a predicate and its complement."""
-        # YOUR CODE HERE
-        predicates = []
-        for clause in self.clause:
-            if -clause in predicates:
-                return True
-            else:
-                predicates.append(clause)
-
-        return False
+        literals = self.literals
+        return any(-l in literals for l in literals)
 
     @property
     def isfalse(self):
         """A clause is false if and only if it is empty."""
-        # YOUR CODE HERE
-        if not self.clause:
-            return True
-        else:
-            return False
+        return len(self) == 0
 
 
 ### Exercise: define simplify
 
 def clause_simplify(self, i):
     """Computes the result simplify the clause according to the
-    truth assignment i."""
-    # YOUR CODE HERE
-    items = self.clause
-    for clause in self.clause:
-        if clause == i:
-            return True
-        elif -(clause) == i:
-            items.remove(clause)
-            self.literals = frozenset(items)
-            return self
-
+    truth assignment i: True if the clause contains i, and otherwise
+    the clause without -i."""
+    literals = self.literals
+    if i in literals:
+        return True
+    elif -i in literals:
+        return Clause(literals - {-i})
     return self
 
 Clause.simplify = clause_simplify
@@ -81,22 +139,41 @@ class SAT(object):
 
     def __init__(self, clause_list):
         """clause_list is a list of lists (or better, an iterable of
-        iterables), to represent a list or set of clauses."""
-        raw_clauses = {Clause(c) for c in clause_list}
+        iterables), to represent a list or set of clauses.  The clauses are
+        stored in a ClauseArena, self.arena."""
+        self.arena = ClauseArena()
+        self.engine = None  # The PropagationEngine kept between solves.
+        self.stats = SolverStats()
+        self.core = []  # Failed assumptions of the last unsatisfiable solve.
+        for c in clause_list:
+            self.add_clause(c)
+
+    def add_clause(self, clause):
+        """Adds a clause.  If the problem has already been solved, the clause
+        is also added to the engine, which keeps its learned clauses and
+        heuristic state for the next solve."""
+        literals = dict.fromkeys(clause)
         # We do some initial sanity checking.
         # If a clause is empty, then it
         # cannot be satisfied, and the entire problem is False.
         # If a clause is true, it can be dropped.
-        self.clauses = set()
-        for c in raw_clauses:
-            if c.isfalse:
-                # Unsatisfiable.
-                self.clauses = {c}
-                break
-            elif c.istrue:
-                pass
-            else:
-                self.clauses.add(c)
+        if any(-l in literals for l in literals):
+            return
+        if self.arena.lengths and self.arena.lengths[0] == 0:
+            # Already unsatisfiable.
+            pass
+        elif not literals:
+            self.arena = ClauseArena()
+            self.arena.add(())
+        else:
+            self.arena.add(literals)
+        if self.engine is not None:
+            self.engine.add_clause(literals)
+
+    @property
+    def clauses(self):
+        """The set of clauses, as Clause views onto the arena."""
+        return {Clause.view(self.arena, i) for i in range(len(self.arena))}
 
     def __repr__(self):
         return repr(self.clauses)
@@ -108,25 +185,10 @@ class SAT(object):
 
 
 def sat_istrue(self):
-    # YOUR CODE HERE
-    if not self.clauses:
-        return True
-    else:
-        return False
-def sat_isfalse(self):
-    # YOUR CODE HERE
-    clauseList = []
-
-    for c in self.clauses:
-        newList = []
-        for item in c.literals:
-            newList.append(item)
-        clauseList.append(newList)
+    return len(self.arena) == 0
 
-    if [] in clauseList:
-        return True
-    else:
-        return False
+def sat_isfalse(self):
+    return 0 in self.arena.lengths
 
 SAT.istrue = property(sat_istrue)
 SAT.isfalse = property(sat_isfalse)
@@ -138,18 +200,12 @@ SAT.isfalse = property(sat_isfalse)
 def sat_generate_candidate_assignments(self):
     """Generates candidate assignments.
     Picks one of the shortest clauses, and return as candidate assignments
-    a list of sets, one for each of the literals of the chosen clause."""
-    # YOUR CODE HERE
-    minClause = []
-    minLength = 9999999
-
-    for c in self.clauses:
-        length = len(c.literals)
-        if length < minLength:
-            minClause = c.literals
-            minLength = length
-
-    return minClause
+    the literals of the chosen clause."""
+    lengths = self.arena.lengths
+    if not lengths:
+        return frozenset()
+    shortest = min(range(len(lengths)), key=lengths.__getitem__)
+    return frozenset(self.arena.literals(shortest))
 
 SAT.generate_candidate_assignments = sat_generate_candidate_assignments
 
@@ -160,116 +216,2236 @@ def sat_apply_assignment(self, assignment):
     """Applies the assignment to every clause.
     If the result of the simplification is True (the boolean True),
     the clause is discarded. The function returns a SAT problem
-    consisting of the simplified, non-True, clauses."""
-    # YOUR CODE HERE
-    newClauses = []
-    for c in self.clauses:
-        newList = []
-        isRemoving = False
-        for item in c.literals:
-            if item == assignment:
-                isRemoving = True
-            elif -(item) != assignment:
-                newList.append(item)
+    consisting of the simplified, non-True, clauses.
+    This copies the whole problem, and is kept for compatibility only:
+    `solve` assigns literals on a PropagationEngine instead."""
+    new_clauses = []
+    for c in self.arena:
+        if assignment in c:
+            continue
+        new_clauses.append([l for l in c if l != -assignment])
+    return SAT(new_clauses)
 
-        if not isRemoving:
-            newClauses.append(newList)
 
-    s = SAT(newClauses)
-    return s
+SAT.apply_assignment = sat_apply_assignment
 
 
-SAT.apply_assignment = sat_apply_assignment
+### Branching heuristics
+
+class VariableHeap(object):
+    """A binary max-heap of variables, ordered by score[v].  Each variable
+    knows its position in the heap, so that it can be moved up in O(log n)
+    when its score increases."""
+
+    def __init__(self, score):
+        self.score = score  # Shared with the heuristic, indexed by variable.
+        self.heap = []
+        self.indices = [-1] * len(score)  # Position in heap, or -1.
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, v):
+        return self.indices[v] >= 0
+
+    def grow(self, size):
+        """Makes room for the variables below size."""
+        self.indices.extend([-1] * (size - len(self.indices)))
+
+    def push(self, v):
+        if self.indices[v] < 0:
+            self.heap.append(v)
+            self.indices[v] = len(self.heap) - 1
+            self.sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """Removes and returns the variable with the highest score."""
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self.sift_down(0)
+        return top
+
+    def increased(self, v):
+        """Restores the heap order after the score of v went up."""
+        if self.indices[v] >= 0:
+            self.sift_up(self.indices[v])
+
+    def sift_up(self, i):
+        heap, indices, score = self.heap, self.indices, self.score
+        v = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if score[heap[parent]] >= score[v]:
+                break
+            heap[i] = heap[parent]
+            indices[heap[i]] = i
+            i = parent
+        heap[i] = v
+        indices[v] = i
+
+    def sift_down(self, i):
+        heap, indices, score = self.heap, self.indices, self.score
+        v = heap[i]
+        n = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and score[heap[child + 1]] > score[heap[child]]:
+                child += 1
+            if score[heap[child]] <= score[v]:
+                break
+            heap[i] = heap[child]
+            indices[heap[i]] = i
+            i = child
+        heap[i] = v
+        indices[v] = i
+
+
+class BranchingHeuristic(object):
+    """Chooses the decision literals of a PropagationEngine.  The engine
+    tells the heuristic about the events it cares about, so that it can keep
+    its state up to date incrementally instead of rescanning the clauses:
+    - attach(engine) is called once, when the clauses have been loaded;
+    - unassigned(v) is called for each variable undone by backtracking;
+    - bump(v) is called for each variable involved in a conflict;
+    - conflict(clause) is called once per conflict, with the learned clause
+      (or, without learning, the conflicting clause);
+    - new_variable(v) is called for variables added after attach.
+    pick(engine) returns an unassigned literal, or None if there is none."""
+
+    def attach(self, engine):
+        pass
+
+    def new_variable(self, v):
+        pass
+
+    def unassigned(self, v):
+        pass
+
+    def bump(self, v):
+        pass
+
+    def conflict(self, clause):
+        pass
+
+    def pick(self, engine):
+        raise NotImplementedError()
+
+
+class HeapHeuristic(BranchingHeuristic):
+    """Picks the unassigned variable of highest score from a VariableHeap.
+    Assigned variables are dropped lazily when they reach the top of the
+    heap, and put back when backtracking unassigns them, so that a decision
+    costs O(log n)."""
+
+    def attach(self, engine):
+        self.score = [0.0] * len(engine.value)
+        self.heap = VariableHeap(self.score)
+        for v in engine.variables:
+            self.heap.push(v)
+
+    def unassigned(self, v):
+        self.heap.push(v)
+
+    def new_variable(self, v):
+        self.score.extend([0.0] * (v + 1 - len(self.score)))
+        self.heap.grow(len(self.score))
+        self.heap.push(v)
+
+    def pick(self, engine):
+        value = engine.value
+        heap = self.heap
+        while heap:
+            v = heap.pop()
+            if value[v] == 0:
+                return engine.phase[v]
+        return None
+
+
+class VSIDSHeuristic(HeapHeuristic):
+    """Variable State Independent Decaying Sum: variables involved in
+    conflicts have their activity bumped, and all activities decay after
+    each conflict, so that the search focuses on the variables of recent
+    conflicts.  Decay is implemented by growing the bump increment, and
+    the activities are rescaled when they get too large."""
+
+    def __init__(self, decay=0.95):
+        self.decay = decay
+        self.increment = 1.0
+
+    def bump(self, v):
+        score = self.score
+        score[v] += self.increment
+        if score[v] > 1e100:
+            for u in range(len(score)):
+                score[u] *= 1e-100
+            self.increment *= 1e-100
+        self.heap.increased(v)
+
+    def conflict(self, clause):
+        self.increment /= self.decay
+
+
+class ShortestClauseHeuristic(HeapHeuristic):
+    """A MOMs-like rule, preferring variables that occur in short clauses.
+    Each clause of length k adds 2 ** -k to the score of its variables
+    (the Jeroslow-Wang weighting), and learned clauses are added as they
+    are produced, so the scores never need to be recomputed."""
+
+    def attach(self, engine):
+        HeapHeuristic.attach(self, engine)
+        for c in engine.arena:
+            self.add_clause(c)
+        for l in engine.trail:
+            self.add_clause([l])
+
+    def add_clause(self, clause):
+        weight = 2.0 ** -len(clause)
+        for l in clause:
+            self.score[abs(l)] += weight
+            self.heap.increased(abs(l))
+
+    def conflict(self, clause):
+        self.add_clause(clause)
+
+
+HEURISTICS = {
+    "vsids": VSIDSHeuristic,
+    "shortest": ShortestClauseHeuristic,
+}
+
+
+def make_heuristic(heuristic):
+    """Returns a BranchingHeuristic, given either one, or its name in
+    HEURISTICS."""
+    if isinstance(heuristic, BranchingHeuristic):
+        return heuristic
+    assert heuristic in HEURISTICS, "Unknown heuristic: {}".format(heuristic)
+    return HEURISTICS[heuristic]()
+
+
+### Restarts
+
+def luby(i):
+    """Returns the i-th element (from 0) of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ..."""
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i = i % size
+    return 2 ** power
+
+
+class RestartPolicy(object):
+    """Decides when the CDCL search restarts.  conflict(lbd) is called after
+    each conflict, with the LBD of the learned clause (the number of
+    decision levels among its literals), and returns True if the search
+    should restart now.  This base policy never restarts."""
+
+    def conflict(self, lbd):
+        return False
+
+
+class LubyRestarts(RestartPolicy):
+    """Restarts after unit * luby(i) conflicts, for i = 0, 1, 2, ..."""
+
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.index = 0
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+        self.conflicts += 1
+        if self.conflicts >= self.unit * luby(self.index):
+            self.index += 1
+            self.conflicts = 0
+            return True
+        return False
+
+
+class GeometricRestarts(RestartPolicy):
+    """Restarts after first conflicts, and then after intervals growing by
+    factor each time."""
+
+    def __init__(self, first=100, factor=1.5):
+        self.interval = first
+        self.factor = factor
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+        self.conflicts += 1
+        if self.conflicts >= self.interval:
+            self.interval *= self.factor
+            self.conflicts = 0
+            return True
+        return False
+
+
+class GlucoseRestarts(RestartPolicy):
+    """Glucose-style dynamic restarts: restarts when the LBDs of the last
+    window learned clauses are, on average, worse than the average over the
+    whole search by more than the given margin."""
+
+    def __init__(self, window=50, margin=0.8):
+        self.recent = deque(maxlen=window)
+        self.margin = margin
+        self.total = 0
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+        self.recent.append(lbd)
+        self.total += lbd
+        self.conflicts += 1
+        window = self.recent.maxlen
+        if len(self.recent) == window and \
+                sum(self.recent) * self.margin > self.total * window / self.conflicts:
+            self.recent.clear()
+            return True
+        return False
+
+
+RESTARTS = {
+    "none": RestartPolicy,
+    "luby": LubyRestarts,
+    "geometric": GeometricRestarts,
+    "glucose": GlucoseRestarts,
+}
+
+
+def make_restart_policy(restarts):
+    """Returns a RestartPolicy, given either one, or its name in RESTARTS."""
+    if isinstance(restarts, RestartPolicy):
+        return restarts
+    assert restarts in RESTARTS, "Unknown restart policy: {}".format(restarts)
+    return RESTARTS[restarts]()
+
+
+# Learned clause database reduction: the learned clauses to keep first.
+REDUCTIONS = ("lbd", "activity")
+
+
+### Statistics
+
+class SolverStats(object):
+    """Counters describing the work done by the solvers of a SAT problem,
+    accumulated over all its solves, and the time spent in each phase
+    ("load", "preprocess", "search", and "reduce", which is part of the
+    search).  Counters are plain integers updated outside of the inner
+    loops, so keeping them costs nothing measurable."""
+
+    __slots__ = ("decisions", "propagations", "conflicts", "restarts",
+                 "learned", "deleted", "flips", "time")
+
+    def __init__(self):
+        self.decisions = 0
+        self.propagations = 0  # Literals propagated.
+        self.conflicts = 0
+        self.restarts = 0
+        self.learned = 0  # Learned clauses, including units.
+        self.deleted = 0  # Learned clauses deleted by reductions.
+        self.flips = 0  # Local search flips.
+        self.time = defaultdict(float)  # Phase -> seconds.
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent in the with block to self.time[name]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.time[name] += time.perf_counter() - start
+
+    def as_dict(self):
+        d = {name: getattr(self, name) for name in self.__slots__}
+        d["time"] = dict(self.time)
+        return d
+
+    def __repr__(self):
+        return "SolverStats({})".format(self.as_dict())
+
+
+### Watched-literal propagation engine
+
+class PropagationEngine(object):
+    """Unit propagation over a clause database, with two watched literals
+    per clause.  The first two literals of each clause are the watched ones;
+    a clause is only looked at when one of its watched literals becomes
+    false.  The current assignment is kept on a trail, with trail_lim
+    recording where each decision level starts, so that backtracking undoes
+    just the literals assigned since a decision, and nothing is copied.
+    For each assigned variable we also record its decision level, and the
+    clause that implied it (its reason), which conflict analysis uses.
+    The clauses of two or more literals, including the learned ones, are
+    kept in a ClauseArena of the engine, and referred to by index."""
+
+    def __init__(self, clauses, heuristic="vsids", phase_saving=True,
+                 seed=None, stats=None):
+        """clauses is an iterable of iterables of literals, without
+        tautologies (for instance, a ClauseArena).  heuristic is a
+        BranchingHeuristic, or the name of one in HEURISTICS.  With
+        phase_saving, a variable is decided with the value it last had;
+        otherwise, it is decided false.  If a seed is given, the initial
+        phases and the order of the variables are randomized with it.
+        stats is the SolverStats to update (by default, a new one)."""
+        self.stats = SolverStats() if stats is None else stats
+        self.arena = ClauseArena()
+        self.phase_saving = phase_saving
+        self.exchange = None  # ClauseExchange shared with other solvers.
+        self.proof = None  # DratWriter recording learned clauses.
+        self.core = []  # Failed assumptions, set by cdcl.
+        self.watches = defaultdict(list)  # Literal -> clauses watching it.
+        self.variables = set()
+        self.trail = []  # Literals made true, in assignment order.
+        self.trail_lim = []  # Start of each decision level in the trail.
+        self.qhead = 0  # Next trail literal to propagate.
+        self.learnts = []  # Indices of the learned clauses.
+        self.lbd = {}  # Learned clause -> its LBD when learned.
+        self.clause_activity = {}  # Learned clause -> its activity.
+        self.clause_increment = 1.0
+        self.ok = True  # False once an empty clause is derived at level 0.
+        units = []
+        for c in clauses:
+            literals = set(c)
+            self.variables.update(abs(l) for l in literals)
+            if len(literals) == 0:
+                self.ok = False
+            elif len(literals) == 1:
+                units.append(literals.pop())
+            else:
+                self.add_watched_clause(literals)
+        # value[v] is the literal of v that is true, or 0 if v is unassigned.
+        size = max(self.variables, default=0) + 1
+        self.value = [0] * size
+        self.level = [0] * size
+        self.reason = [None] * size
+        self.seen = [False] * size  # Scratch space for conflict analysis.
+        self.phase = [-v for v in range(size)]  # Polarity of next decision.
+        self.variable_set = self.variables
+        self.variables = sorted(self.variables)
+        if seed is not None:
+            rng = random.Random(seed)
+            rng.shuffle(self.variables)
+            for v in self.variables:
+                self.phase[v] = rng.choice((v, -v))
+        for l in units:
+            if not self.enqueue(l):
+                self.ok = False
+        self.heuristic = make_heuristic(heuristic)
+        self.heuristic.attach(self)
+
+    def add_watched_clause(self, literals):
+        """Stores a clause of at least two literals, watching the first two."""
+        arena = self.arena
+        ci = arena.add(literals)
+        start = arena.starts[ci]
+        self.watches[arena.lits[start]].append(ci)
+        self.watches[arena.lits[start + 1]].append(ci)
+        return ci
+
+    def add_clause(self, literals, learnt=False):
+        """Adds a clause, after backtracking to level 0.  The clause is first
+        simplified by the level 0 assignment.  learnt clauses can later be
+        deleted by reduce_learnts.  Returns False if the clauses are now
+        unsatisfiable."""
+        self.backtrack(0)
+        value = self.value
+        literals = set(literals)
+        for l in literals:
+            self.add_variable(abs(l))
+        if any(value[abs(l)] == l or -l in literals for l in literals):
+            return self.ok
+        literals = [l for l in literals if value[abs(l)] == 0]
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0])
+        else:
+            ci = self.add_watched_clause(literals)
+            if learnt:
+                self.learnts.append(ci)
+                self.lbd[ci] = len(literals)
+                self.clause_activity[ci] = self.clause_increment
+        return self.ok
+
+    def add_variable(self, v):
+        """Makes room for variable v, if it is new."""
+        if v >= len(self.value):
+            extra = v + 1 - len(self.value)
+            self.phase.extend(-u for u in range(len(self.value), v + 1))
+            self.value.extend([0] * extra)
+            self.level.extend([0] * extra)
+            self.reason.extend([None] * extra)
+            self.seen.extend([False] * extra)
+        if v not in self.variable_set:
+            self.variable_set.add(v)
+            self.variables.append(v)
+            self.heuristic.new_variable(v)
+
+    @property
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def lit_value(self, l):
+        """Returns True, False, or None if l is unassigned."""
+        v = self.value[abs(l)]
+        return None if v == 0 else v == l
+
+    def assign(self, l, reason=None):
+        """Makes the unassigned literal l true.  reason is the index of the
+        clause that implies l, or None for decisions and level 0 facts."""
+        v = abs(l)
+        self.value[v] = l
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(l)
+
+    def enqueue(self, l):
+        """Makes l true unless it is already assigned.  Returns False if l
+        is already false."""
+        v = self.value[abs(l)]
+        if v == 0:
+            self.assign(l)
+            return True
+        return v == l
+
+    def new_decision_level(self):
+        self.trail_lim.append(len(self.trail))
+
+    def backtrack(self, level):
+        """Undoes all assignments made above the given decision level."""
+        if self.decision_level <= level:
+            return
+        value = self.value
+        unassigned = self.heuristic.unassigned
+        start = self.trail_lim[level]
+        if self.phase_saving:
+            phase = self.phase
+            for l in self.trail[start:]:
+                phase[abs(l)] = l
+        for l in self.trail[start:]:
+            value[abs(l)] = 0
+            unassigned(abs(l))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def propagate(self):
+        """Propagates the literals on the trail that have not been propagated
+        yet.  Returns the index of a clause that became false, or None."""
+        trail = self.trail
+        value = self.value
+        lits = self.arena.lits
+        starts = self.arena.starts
+        lengths = self.arena.lengths
+        watches = self.watches
+        start_qhead = self.qhead
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watch_list = watches[false_lit]
+            n = len(watch_list)
+            i = j = 0
+            while i < n:
+                ci = watch_list[i]
+                i += 1
+                start = starts[ci]
+                # Keeps the false literal in position 1.
+                first = lits[start]
+                if first == false_lit:
+                    first = lits[start + 1]
+                    lits[start] = first
+                    lits[start + 1] = false_lit
+                if value[abs(first)] == first:
+                    # The clause is already satisfied.
+                    watch_list[j] = ci
+                    j += 1
+                    continue
+                for k in range(start + 2, start + lengths[ci]):
+                    l = lits[k]
+                    if value[abs(l)] != -l:
+                        # Found a new literal to watch.
+                        lits[start + 1] = l
+                        lits[k] = false_lit
+                        watches[l].append(ci)
+                        break
+                else:
+                    # The clause is unit or false under the assignment.
+                    watch_list[j] = ci
+                    j += 1
+                    if value[abs(first)] == -first:
+                        while i < n:
+                            watch_list[j] = watch_list[i]
+                            j += 1
+                            i += 1
+                        del watch_list[j:]
+                        self.stats.propagations += self.qhead - start_qhead
+                        self.qhead = len(trail)
+                        return ci
+                    self.assign(first, ci)
+            del watch_list[j:]
+        self.stats.propagations += self.qhead - start_qhead
+        return None
+
+    def pick_branch_literal(self):
+        """Returns an unassigned literal chosen by the heuristic, or None if
+        all variables are assigned."""
+        return self.heuristic.pick(self)
+
+    def learned_clauses(self):
+        """Generates the learned clauses, for instance to write them out with
+        write_dimacs."""
+        for ci in self.learnts:
+            yield self.arena.literals(ci)
+
+    def model(self):
+        """Returns the current assignment, sorted by variable."""
+        return sorted(self.trail, key=abs)
+
+    def dpll(self, progress=None, progress_interval=1000):
+        """Depth-first search with chronological backtracking: on a conflict,
+        the most recent decision whose negation has not been tried yet is
+        flipped.  If progress is given, progress(self.stats) is called every
+        progress_interval conflicts.
+        Returns a satisfying assignment, or False."""
+        stats = self.stats
+        self.backtrack(0)
+        if not self.ok:
+            return False
+        flipped = []  # One flag per decision level.
+        while True:
+            ci = self.propagate()
+            if ci is None:
+                l = self.pick_branch_literal()
+                if l is None:
+                    return self.model()
+                stats.decisions += 1
+                self.new_decision_level()
+                flipped.append(False)
+                self.assign(l)
+            else:
+                stats.conflicts += 1
+                if progress is not None and \
+                        stats.conflicts % progress_interval == 0:
+                    progress(stats)
+                conflict = self.arena.literals(ci)
+                for l in conflict:
+                    self.heuristic.bump(abs(l))
+                self.heuristic.conflict(conflict)
+                while flipped and flipped[-1]:
+                    flipped.pop()
+                if not flipped:
+                    return False
+                level = len(flipped)
+                l = self.trail[self.trail_lim[level - 1]]
+                self.backtrack(level - 1)
+                self.new_decision_level()
+                flipped[-1] = True
+                self.assign(-l)
+
+    def analyze(self, ci):
+        """Analyzes the conflict in clause ci, resolving it with the reasons
+        of the literals assigned at the current decision level until only
+        one such literal is left (the first unique implication point).
+        Returns the learned clause, whose first literal is the negation of
+        that point, and the level to backjump to, at which the learned
+        clause becomes unit."""
+        arena = self.arena
+        trail = self.trail
+        level = self.level
+        reason = self.reason
+        seen = self.seen
+        bump = self.heuristic.bump
+        clause_activity = self.clause_activity
+        current_level = self.decision_level
+        learnt = [0]  # learnt[0] is filled in with the asserting literal.
+        pending = 0  # Literals of the current level still to be resolved.
+        p = None
+        index = len(trail) - 1
+        while True:
+            if ci in clause_activity:
+                self.bump_clause(ci)
+            c = arena.literals(ci)
+            # The implied literal of a reason clause is its first one.
+            for l in (c if p is None else c[1:]):
+                v = abs(l)
+                if not seen[v] and level[v] > 0:
+                    seen[v] = True
+                    bump(v)
+                    if level[v] == current_level:
+                        pending += 1
+                    else:
+                        learnt.append(l)
+            while not seen[abs(trail[index])]:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            seen[abs(p)] = False
+            pending -= 1
+            if pending == 0:
+                break
+            ci = reason[abs(p)]
+        learnt[0] = -p
+        for l in learnt[1:]:
+            seen[abs(l)] = False
+        # The literal with the highest level is watched together with the
+        # asserting one, and its level is where we jump back to.
+        backjump_level = 0
+        if len(learnt) > 1:
+            k = max(range(1, len(learnt)), key=lambda i: level[abs(learnt[i])])
+            learnt[1], learnt[k] = learnt[k], learnt[1]
+            backjump_level = level[abs(learnt[1])]
+        return learnt, backjump_level
+
+    def compute_lbd(self, literals):
+        """Returns the number of distinct decision levels of the literals."""
+        level = self.level
+        return len({level[abs(l)] for l in literals})
+
+    def bump_clause(self, ci):
+        activity = self.clause_activity
+        activity[ci] += self.clause_increment
+        if activity[ci] > 1e20:
+            for c in activity:
+                activity[c] *= 1e-20
+            self.clause_increment *= 1e-20
+
+    def learn(self, learnt, lbd):
+        """Adds a learned clause after backjumping, and assigns its asserting
+        literal.  Unit clauses are simply assigned at level 0."""
+        self.stats.learned += 1
+        if self.proof is not None:
+            self.proof.add(learnt)
+        if len(learnt) == 1:
+            self.assign(learnt[0])
+        else:
+            ci = self.add_watched_clause(learnt)
+            self.learnts.append(ci)
+            self.lbd[ci] = lbd
+            self.clause_activity[ci] = self.clause_increment
+            self.assign(learnt[0], ci)
+
+    def reduce_learnts(self, keep="lbd"):
+        """Deletes half of the learned clauses, keeping those with the lowest
+        LBD or the highest activity.  Clauses of LBD 2 ("glue" clauses), and
+        clauses that are the reason of a current assignment, are always
+        kept.  The arena is then compacted, and the watches rebuilt."""
+        reason = self.reason
+        locked = {reason[abs(l)] for l in self.trail}
+        candidates = [ci for ci in self.learnts
+                      if ci not in locked and self.lbd[ci] > 2]
+        if keep == "lbd":
+            candidates.sort(key=lambda ci: (-self.lbd[ci],
+                                            self.clause_activity[ci]))
+        else:
+            candidates.sort(key=lambda ci: self.clause_activity[ci])
+        deleted = set(candidates[:len(candidates) // 2])
+        self.stats.deleted += len(deleted)
+        if self.proof is not None:
+            for ci in deleted:
+                self.proof.delete(self.arena.literals(ci))
+        self.collect_garbage(deleted)
+
+    def collect_garbage(self, deleted):
+        """Removes the clauses with the given indices from the arena, and
+        renumbers the remaining clauses in the watches, reasons and learned
+        clause data."""
+        old = self.arena
+        self.arena = ClauseArena()
+        renumber = {}
+        for ci in range(len(old)):
+            if ci not in deleted:
+                renumber[ci] = self.arena.add(old.literals(ci))
+        self.learnts = [renumber[ci] for ci in self.learnts
+                        if ci not in deleted]
+        self.lbd = {renumber[ci]: x for ci, x in self.lbd.items()
+                    if ci not in deleted}
+        self.clause_activity = {renumber[ci]: x
+                                for ci, x in self.clause_activity.items()
+                                if ci not in deleted}
+        reason = self.reason
+        for l in self.trail:
+            if reason[abs(l)] is not None:
+                reason[abs(l)] = renumber[reason[abs(l)]]
+        # The first two literals of each clause are the watched ones.
+        self.watches = defaultdict(list)
+        lits = self.arena.lits
+        for ci, start in enumerate(self.arena.starts):
+            self.watches[lits[start]].append(ci)
+            self.watches[lits[start + 1]].append(ci)
+
+    def analyze_final(self, p):
+        """Called when the assumption p is found false.  Returns the
+        assumptions that imply -p, starting with p itself."""
+        core = [p]
+        if self.decision_level == 0:
+            return core
+        trail = self.trail
+        reason = self.reason
+        level = self.level
+        seen = self.seen
+        seen[abs(p)] = True
+        for i in range(len(trail) - 1, self.trail_lim[0] - 1, -1):
+            l = trail[i]
+            v = abs(l)
+            if seen[v]:
+                if reason[v] is None:
+                    # Below the assumptions, every decision is one of them.
+                    core.append(l)
+                else:
+                    for q in self.arena.literals(reason[v])[1:]:
+                        if level[abs(q)] > 0:
+                            seen[abs(q)] = True
+                seen[v] = False
+        return core
+
+    def block_model(self):
+        """Excludes the current (complete) assignment, by adding the clause
+        made of the negations of its decisions, which imply the rest of it.
+        Only the last decision is undone, and the clause, now unit, flips
+        it; the search can then resume from there.  Returns False if there
+        is no decision to flip, that is, no other model."""
+        if not self.trail_lim:
+            self.ok = False
+            return False
+        clause = [-self.trail[i] for i in reversed(self.trail_lim)]
+        self.backtrack(self.decision_level - 1)
+        if len(clause) == 1:
+            self.assign(clause[0])
+        else:
+            # The watches go to the two last decisions.
+            self.assign(clause[0], self.add_watched_clause(clause))
+        return True
+
+    def refuted(self):
+        """Records that the clauses are unsatisfiable, and returns False."""
+        self.ok = False
+        if self.proof is not None:
+            self.proof.add(())
+        return False
+
+    def cdcl(self, assumptions=(), restarts="luby", reduce="lbd",
+             first_reduce=2000, reduce_increment=300, progress=None,
+             progress_interval=1000, resume=False):
+        """Conflict-driven clause learning: each conflict is analyzed into a
+        learned clause, and the search jumps back non-chronologically to the
+        level where that clause becomes unit.
+        The assumptions are literals decided first, one per decision level;
+        if they cannot all hold, self.core is set to those of them that
+        are responsible (it is empty if the clauses are unsatisfiable
+        regardless).  Learned clauses are kept for later calls.
+        restarts is a RestartPolicy, or the name of one in RESTARTS.
+        reduce is "lbd" or "activity", to say which learned clauses are kept
+        when the database is halved, or None to keep them all; the first
+        reduction happens after first_reduce conflicts, and the interval
+        grows by reduce_increment each time.
+        If progress is given, progress(self.stats) is called every
+        progress_interval conflicts.
+        The search starts at level 0, unless resume is True (and there are
+        no assumptions), in which case it goes on from the current
+        assignment, for instance after block_model.
+        Returns a satisfying assignment, or False."""
+        assert reduce is None or reduce in REDUCTIONS, \
+            "Unknown reduction policy: {}".format(reduce)
+        stats = self.stats
+        restarts = make_restart_policy(restarts)
+        reduce_interval = first_reduce
+        next_reduce = stats.conflicts + reduce_interval
+        self.core = []
+        if assumptions or not resume:
+            self.backtrack(0)
+        for p in assumptions:
+            self.add_variable(abs(p))
+        if not self.ok:
+            return self.refuted()
+        while True:
+            ci = self.propagate()
+            if ci is not None:
+                stats.conflicts += 1
+                if progress is not None and \
+                        stats.conflicts % progress_interval == 0:
+                    progress(stats)
+                if self.decision_level == 0:
+                    return self.refuted()
+                learnt, level = self.analyze(ci)
+                lbd = self.compute_lbd(learnt)
+                self.heuristic.conflict(learnt)
+                self.clause_increment /= 0.999
+                self.backtrack(level)
+                self.learn(learnt, lbd)
+                if self.exchange is not None:
+                    self.exchange.export(learnt)
+                if restarts.conflict(lbd):
+                    stats.restarts += 1
+                    self.backtrack(0)
+                    if self.exchange is not None:
+                        for c in self.exchange.import_clauses():
+                            if not self.add_clause(c, learnt=True):
+                                return False
+                if reduce is not None and stats.conflicts >= next_reduce:
+                    with stats.phase("reduce"):
+                        self.reduce_learnts(reduce)
+                    reduce_interval += reduce_increment
+                    next_reduce = stats.conflicts + reduce_interval
+            else:
+                l = None
+                while self.decision_level < len(assumptions):
+                    p = assumptions[self.decision_level]
+                    if self.value[abs(p)] == p:
+                        # Already true: the level is left empty.
+                        self.new_decision_level()
+                    elif self.value[abs(p)] == -p:
+                        self.core = self.analyze_final(p)
+                        return False
+                    else:
+                        l = p
+                        break
+                if l is None:
+                    l = self.pick_branch_literal()
+                    if l is None:
+                        return self.model()
+                stats.decisions += 1
+                self.new_decision_level()
+                self.assign(l)
+
+
+### Preprocessing
+
+class Preprocessor(object):
+    """Simplifies a CNF before search.  Each clause is kept as a set, with
+    occurrence lists mapping every literal to the clauses containing it,
+    and the following techniques are applied:
+    - propagation of unit clauses;
+    - subsumption: a clause that contains another clause is removed;
+    - self-subsuming resolution: if C contains D with one literal negated,
+      that literal is removed from C;
+    - pure literal elimination: a literal whose negation occurs nowhere is
+      made true;
+    - failed literal probing: if propagating l yields a conflict, -l is
+      made true;
+    - bounded variable elimination: a variable is replaced by all the
+      resolvents of its clauses, when that does not increase the number of
+      clauses.
+    The result is equisatisfiable; extend_model turns a model of the
+    simplified clauses into a model of the original ones."""
+
+    def __init__(self, clauses, probe_limit=1000, elim_occurrences=16,
+                 elim_clause_size=20):
+        """clauses is an iterable of iterables of literals.  probe_limit is
+        the number of variables probed, elim_occurrences the maximum number
+        of occurrences of an eliminated literal, and elim_clause_size the
+        maximum length of a resolvent."""
+        self.probe_limit = probe_limit
+        self.elim_occurrences = elim_occurrences
+        self.elim_clause_size = elim_clause_size
+        self.clauses = []  # Sets of literals, None for removed clauses.
+        self.occurs = defaultdict(set)  # Literal -> indices of its clauses.
+        self.variables = set()
+        self.fixed = {}  # Variable -> its literal that is true.
+        self.units = []  # Literals waiting to be fixed.
+        self.elimination_stack = []  # (witness, clause), in elimination order.
+        self.eliminated = set()
+        self.touched = []  # Clauses to check for subsumption.
+        self.ok = True
+        for c in clauses:
+            c = set(c)
+            self.variables.update(abs(l) for l in c)
+            if not any(-l in c for l in c):
+                self.add(c)
+
+    def add(self, c):
+        """Adds the clause c (a set of literals)."""
+        if not c:
+            self.ok = False
+            return
+        if len(c) == 1:
+            self.units.append(next(iter(c)))
+        i = len(self.clauses)
+        self.clauses.append(c)
+        for l in c:
+            self.occurs[l].add(i)
+        self.touched.append(i)
+
+    def remove(self, i):
+        for l in self.clauses[i]:
+            self.occurs[l].discard(i)
+        self.clauses[i] = None
+
+    def strengthen(self, i, l):
+        """Removes the literal l from clause i."""
+        c = self.clauses[i]
+        c.discard(l)
+        self.occurs[l].discard(i)
+        if not c:
+            self.ok = False
+        elif len(c) == 1:
+            self.units.append(next(iter(c)))
+        self.touched.append(i)
+
+    def propagate_units(self):
+        while self.units and self.ok:
+            l = self.units.pop()
+            v = abs(l)
+            if v in self.fixed:
+                self.ok = self.fixed[v] == l
+                continue
+            self.fixed[v] = l
+            for i in list(self.occurs[l]):
+                self.remove(i)
+            for i in list(self.occurs[-l]):
+                self.strengthen(i, -l)
+        return self.ok
+
+    def subsume(self):
+        """Runs backward subsumption and self-subsuming resolution from every
+        touched clause, shortest first."""
+        clauses = self.clauses
+        occurs = self.occurs
+        while self.touched and self.propagate_units():
+            touched = sorted(set(self.touched),
+                             key=lambda i: len(clauses[i] or ()))
+            self.touched = []
+            for i in touched:
+                c = clauses[i]
+                if not self.ok:
+                    return False
+                if c is None:
+                    continue
+                # Any clause subsumed or strengthened by c contains p or -p.
+                p = min(c, key=lambda l: len(occurs[l]) + len(occurs[-l]))
+                for j in list(occurs[p]) + list(occurs[-p]):
+                    d = clauses[j]
+                    if j == i or d is None or len(d) < len(c):
+                        continue
+                    diff = c - d
+                    if not diff:
+                        self.remove(j)
+                    elif len(diff) == 1:
+                        q = next(iter(diff))
+                        if -q in d:
+                            self.strengthen(j, -q)
+        return self.propagate_units()
+
+    def pure_literals(self):
+        for v in self.variables:
+            if v in self.fixed or v in self.eliminated:
+                continue
+            if not self.occurs[-v] and self.occurs[v]:
+                self.units.append(v)
+            elif not self.occurs[v] and self.occurs[-v]:
+                self.units.append(-v)
+        return self.propagate_units()
+
+    def failed(self, l):
+        """Returns True if propagating l on the clauses yields a conflict."""
+        clauses = self.clauses
+        true = {l}
+        queue = [l]
+        while queue:
+            t = queue.pop()
+            for i in self.occurs[-t]:
+                unassigned = None
+                count = 0
+                for x in clauses[i]:
+                    if x in true:
+                        count = 2
+                        break
+                    if -x not in true:
+                        count += 1
+                        unassigned = x
+                        if count > 1:
+                            break
+                if count == 0:
+                    return True
+                if count == 1:
+                    true.add(unassigned)
+                    queue.append(unassigned)
+        return False
+
+    def probe(self):
+        candidates = sorted(
+            (v for v in self.variables
+             if v not in self.fixed and v not in self.eliminated),
+            key=lambda v: -len(self.occurs[v]) - len(self.occurs[-v]))
+        for v in candidates[:self.probe_limit]:
+            for l in (v, -v):
+                if abs(l) not in self.fixed and self.failed(l):
+                    self.units.append(-l)
+                    if not self.propagate_units():
+                        return False
+        return self.ok
+
+    def resolvents(self, v):
+        """Returns the non-tautological resolvents on v, or None if there
+        are more of them than the clauses they replace, or if one of them
+        is too long."""
+        clauses = self.clauses
+        positive = self.occurs[v]
+        negative = self.occurs[-v]
+        limit = len(positive) + len(negative)
+        result = []
+        for i in positive:
+            for j in negative:
+                r = (clauses[i] | clauses[j]) - {v, -v}
+                if any(-l in r for l in r):
+                    continue
+                if len(r) > self.elim_clause_size or len(result) == limit:
+                    return None
+                result.append(r)
+        return result
+
+    def eliminate(self):
+        """Bounded variable elimination, trying the variables with the
+        fewest occurrences first."""
+        occurs = self.occurs
+        candidates = sorted(
+            (v for v in self.variables
+             if v not in self.fixed and v not in self.eliminated),
+            key=lambda v: len(occurs[v]) + len(occurs[-v]))
+        for v in candidates:
+            if v in self.fixed or not (occurs[v] or occurs[-v]):
+                continue
+            if len(occurs[v]) > self.elim_occurrences or \
+                    len(occurs[-v]) > self.elim_occurrences:
+                continue
+            resolvents = self.resolvents(v)
+            if resolvents is None:
+                continue
+            # The clauses containing v are enough to reconstruct v.
+            for i in occurs[v]:
+                self.elimination_stack.append((v, list(self.clauses[i])))
+            for i in list(occurs[v]) + list(occurs[-v]):
+                self.remove(i)
+            self.eliminated.add(v)
+            for r in resolvents:
+                self.add(r)
+            if not self.propagate_units():
+                return False
+        return self.ok
+
+    def run(self):
+        """Runs the whole pipeline.  Returns False if the clauses were found
+        to be unsatisfiable."""
+        return (self.propagate_units() and self.subsume() and
+                self.pure_literals() and self.probe() and
+                self.eliminate() and self.subsume())
+
+    def remaining(self):
+        """Generates the simplified clauses."""
+        for c in self.clauses:
+            if c is not None:
+                yield c
+
+    def extend_model(self, model):
+        """Given a model of the simplified clauses, returns a model of the
+        original ones, as a list of literals sorted by variable.  Variables
+        that do not matter are set to false."""
+        values = {abs(l): l for l in model}
+        values.update(self.fixed)
+        for v in self.variables:
+            values.setdefault(v, -v)
+        # Undoes the eliminations, last one first: the eliminated variable
+        # is made true if one of its clauses needs it.
+        for witness, clause in reversed(self.elimination_stack):
+            if not any(values[abs(l)] == l for l in clause):
+                values[abs(witness)] = witness
+        return sorted(values.values(), key=abs)
+
+
+### Parallel portfolio
+
+class ClauseExchange(object):
+    """A ring buffer in shared memory, through which portfolio workers share
+    their short learned clauses.  Each slot holds the index of the worker
+    that wrote it, the length of the clause, and up to max_length literals.
+    Readers that fall more than a full ring behind lose the oldest
+    clauses."""
+
+    def __init__(self, slots=4096, max_length=8):
+        self.slots = slots
+        self.max_length = max_length
+        self.buffer = multiprocessing.Array("i", slots * (max_length + 2))
+        # Number of clauses ever written; protected by the buffer lock.
+        self.head = multiprocessing.Value("q", 0, lock=False)
+        self.worker = None
+        self.read = 0  # Number of clauses read by this worker.
+
+    def export(self, literals):
+        """Publishes a learned clause, if it is short enough."""
+        n = len(literals)
+        if n > self.max_length:
+            return
+        with self.buffer.get_lock():
+            buffer = self.buffer.get_obj()
+            slot = (self.head.value % self.slots) * (self.max_length + 2)
+            buffer[slot] = self.worker
+            buffer[slot + 1] = n
+            buffer[slot + 2:slot + 2 + n] = literals
+            self.head.value += 1
+
+    def import_clauses(self):
+        """Returns the clauses published by the other workers since the last
+        call."""
+        clauses = []
+        with self.buffer.get_lock():
+            buffer = self.buffer.get_obj()
+            head = self.head.value
+            for k in range(max(self.read, head - self.slots), head):
+                slot = (k % self.slots) * (self.max_length + 2)
+                if buffer[slot] != self.worker:
+                    n = buffer[slot + 1]
+                    clauses.append(buffer[slot + 2:slot + 2 + n])
+            self.read = head
+        return clauses
+
+
+# Solver configurations used by the portfolio workers, in turn.
+PORTFOLIO = [
+    dict(heuristic="vsids", restarts="luby"),
+    dict(heuristic="vsids", restarts="glucose"),
+    dict(heuristic="vsids", restarts="geometric", phase_saving=False),
+    dict(heuristic="shortest", restarts="luby"),
+    dict(heuristic="vsids", restarts="glucose", reduce="activity"),
+]
+
+
+def portfolio_worker(arena, config, worker, results, exchange):
+    """Runs in a worker process: solves the clauses with one configuration,
+    and puts (worker, result) on the results queue."""
+    try:
+        engine = PropagationEngine(
+            arena, heuristic=config.get("heuristic", "vsids"),
+            phase_saving=config.get("phase_saving", True),
+            seed=config.get("seed"))
+        if exchange is not None:
+            exchange.worker = worker
+            engine.exchange = exchange
+        results.put((worker, engine.cdcl(
+            restarts=config.get("restarts", "luby"),
+            reduce=config.get("reduce", "lbd"))))
+    except Exception as e:
+        results.put((worker, e))
+
+
+def solve_portfolio(clauses, workers=None, configs=None, share=True):
+    """Solves the clauses with several CDCL solvers running in parallel
+    processes, and returns the first answer, terminating the other solvers.
+    workers is the number of processes (by default, one per CPU), and
+    configs a list of configurations (dictionaries of heuristic,
+    phase_saving, seed, restarts and reduce), used in turn; by default,
+    PORTFOLIO is used, with a different seed for each worker.  If share is
+    True, the workers exchange short learned clauses."""
+    if not isinstance(clauses, ClauseArena):
+        arena = ClauseArena()
+        for c in clauses:
+            arena.add(c)
+        clauses = arena
+    workers = workers or os.cpu_count() or 1
+    if configs is None:
+        configs = [dict(PORTFOLIO[i % len(PORTFOLIO)], seed=i or None)
+                   for i in range(workers)]
+    results = multiprocessing.Queue()
+    exchange = ClauseExchange() if share else None
+    processes = [
+        multiprocessing.Process(
+            target=portfolio_worker,
+            args=(clauses, configs[i % len(configs)], i, results, exchange),
+            daemon=True)
+        for i in range(workers)]
+    for p in processes:
+        p.start()
+    try:
+        errors = []
+        while len(errors) < workers:
+            worker, result = results.get()
+            if not isinstance(result, Exception):
+                return result
+            errors.append(result)
+        raise errors[0]
+    finally:
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.join()
+
+
+### Local search
+
+# Returned by local search when it gives up: it cannot prove unsatisfiability.
+UNKNOWN = "unknown"
+
+
+class LocalSearch(object):
+    """Stochastic local search over the clauses of a ClauseArena.  A complete
+    assignment is repaired by flipping one variable at a time, chosen from a
+    random unsatisfied clause.  For every clause we keep the number of true
+    literals, and the xor of their variables, which is the variable of the
+    only true literal when there is one.  From these, we maintain
+    incrementally for every variable its break count (the clauses that a
+    flip would make false) and its make count (the false clauses that a
+    flip would make true), and the list of unsatisfied clauses, each of
+    which knows its position in the list."""
+
+    def __init__(self, clauses, seed=None):
+        """clauses is a ClauseArena, or an iterable of iterables of
+        literals."""
+        if not isinstance(clauses, ClauseArena):
+            arena = ClauseArena()
+            for c in clauses:
+                arena.add(c)
+            clauses = arena
+        self.arena = clauses
+        self.rng = random.Random(seed)
+        self.occurs = defaultdict(list)  # Literal -> clauses containing it.
+        variables = set()
+        for ci, c in enumerate(clauses):
+            for l in c:
+                self.occurs[l].append(ci)
+                variables.add(abs(l))
+        self.variables = sorted(variables)
+        size = max(variables, default=0) + 1
+        self.value = [0] * size  # value[v] is the literal of v that is true.
+        self.break_count = [0] * size
+        self.make_count = [0] * size
+        self.true_count = [0] * len(clauses)
+        self.true_xor = [0] * len(clauses)
+        self.unsat = []
+        self.unsat_position = [-1] * len(clauses)
+        self.flips = 0
+
+    def randomize(self):
+        """Starts from a random assignment, and computes the counts."""
+        rng = self.rng
+        value = self.value
+        for v in self.variables:
+            value[v] = v if rng.random() < 0.5 else -v
+        self.break_count = [0] * len(value)
+        self.make_count = [0] * len(value)
+        self.unsat = []
+        for ci, c in enumerate(self.arena):
+            count = 0
+            x = 0
+            for l in c:
+                if value[abs(l)] == l:
+                    count += 1
+                    x ^= abs(l)
+            self.true_count[ci] = count
+            self.true_xor[ci] = x
+            if count == 0:
+                self.make_unsat(ci, c)
+            elif count == 1:
+                self.break_count[x] += 1
+
+    def make_unsat(self, ci, c):
+        self.unsat_position[ci] = len(self.unsat)
+        self.unsat.append(ci)
+        for l in c:
+            self.make_count[abs(l)] += 1
+
+    def make_sat(self, ci, c):
+        # Moves the last unsatisfied clause in the place of ci.
+        position = self.unsat_position[ci]
+        last = self.unsat.pop()
+        if last != ci:
+            self.unsat[position] = last
+            self.unsat_position[last] = position
+        self.unsat_position[ci] = -1
+        for l in c:
+            self.make_count[abs(l)] -= 1
+
+    def flip(self, v):
+        arena = self.arena
+        true_count = self.true_count
+        true_xor = self.true_xor
+        break_count = self.break_count
+        l = -self.value[v]  # The literal that becomes true.
+        self.value[v] = l
+        self.flips += 1
+        for ci in self.occurs[l]:
+            true_count[ci] += 1
+            if true_count[ci] == 1:
+                self.make_sat(ci, arena.literals(ci))
+                break_count[v] += 1
+            elif true_count[ci] == 2:
+                # The literal that was the only true one is no longer.
+                break_count[true_xor[ci]] -= 1
+            true_xor[ci] ^= v
+        for ci in self.occurs[-l]:
+            true_count[ci] -= 1
+            true_xor[ci] ^= v
+            if true_count[ci] == 0:
+                self.make_unsat(ci, arena.literals(ci))
+                break_count[v] -= 1
+            elif true_count[ci] == 1:
+                break_count[true_xor[ci]] += 1
+
+    def pick_walksat(self, c, noise):
+        """WalkSAT: flips a variable that breaks no clause if there is one;
+        otherwise, with probability noise, a random variable, and else one
+        that breaks the fewest clauses (and makes the most)."""
+        variables = [abs(l) for l in c]
+        breaks = [self.break_count[v] for v in variables]
+        best = min(breaks)
+        if best > 0 and self.rng.random() < noise:
+            return self.rng.choice(variables)
+        candidates = [v for v, b in zip(variables, breaks) if b == best]
+        most = max(self.make_count[v] for v in candidates)
+        return self.rng.choice(
+            [v for v in candidates if self.make_count[v] == most])
+
+    def pick_probsat(self, c, cb, eps=1.0):
+        """ProbSAT: flips each variable with probability proportional to
+        (eps + break) ** -cb."""
+        variables = [abs(l) for l in c]
+        weights = [(eps + self.break_count[v]) ** -cb for v in variables]
+        return self.rng.choices(variables, weights)[0]
+
+    def model(self):
+        return [self.value[v] for v in self.variables]
+
+    def run(self, algorithm="probsat", max_flips=None, timeout=None,
+            noise=0.5, cb=2.3):
+        """Searches from a random assignment with "walksat" or "probsat",
+        until every clause is satisfied, or until max_flips flips or timeout
+        seconds.  Returns a model, or UNKNOWN."""
+        assert algorithm in ("walksat", "probsat"), \
+            "Unknown local search algorithm: {}".format(algorithm)
+        if 0 in self.arena.lengths:
+            return UNKNOWN
+        self.randomize()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        rng = self.rng
+        flips = 0
+        while self.unsat:
+            if max_flips is not None and flips >= max_flips:
+                return UNKNOWN
+            if deadline is not None and flips % 1000 == 0 and \
+                    time.monotonic() > deadline:
+                return UNKNOWN
+            c = self.arena.literals(rng.choice(self.unsat))
+            if algorithm == "walksat":
+                v = self.pick_walksat(c, noise)
+            else:
+                v = self.pick_probsat(c, cb)
+            self.flip(v)
+            flips += 1
+        return self.model()
 
 
 ### Exercise: define `solve`
 
-def sat_solve(self):
+def sat_solve(self, mode="dpll", heuristic="vsids", preprocess=False,
+              restarts="luby", phase_saving=True, reduce="lbd",
+              workers=None, assumptions=(), max_flips=None, timeout=None,
+              seed=None, progress=None, progress_interval=1000, proof=None):
     """Solves a SAT instance.
     First, it checks whether the instance is false (in which case
     it returns False) or true (in which case it returns an empty
     assignment).
 
-    If neither of these applies, generates a list of candidate
-    assignments, and for each of them, applies them to the current SAT
-    instance, generating a new SAT instance, and solves it.
-
-    If the new SAT instance has a solution, merges it with the assignment,
-    and returns it. If it has no solution, tries the next candidate
-    assignment. If no candidate assignment works, returns False, as
-    the SAT problem cannot be satisfied.
-    false is when there is a clause that is empty
-    true is when there is no clauses"""
-    # YOUR CODE HERE
-
+    Otherwise, the clauses are loaded into a PropagationEngine, which
+    searches for a satisfying assignment by unit propagation and
+    backtracking, without rebuilding the problem for each literal.
+    mode selects the search: "dpll" backtracks chronologically, while
+    "cdcl" learns a clause from each conflict and backjumps; "portfolio"
+    runs differently configured CDCL solvers in workers processes (see
+    solve_portfolio), and returns the first answer.  "walksat" and
+    "probsat" run a LocalSearch from a random assignment (given by seed),
+    for at most max_flips flips and timeout seconds; if they find no model,
+    they return UNKNOWN, as local search cannot prove unsatisfiability.
+    heuristic picks the decision variables: "vsids" (conflict activity),
+    "shortest" (occurrences in short clauses), or a BranchingHeuristic.
+    If preprocess is True, the clauses are first simplified by a
+    Preprocessor, and the model is extended back to the original problem.
+    phase_saving makes decisions reuse the last value of each variable.
+    In "cdcl" mode, restarts is a RestartPolicy or one of "none", "luby",
+    "geometric" and "glucose", and reduce is "lbd", "activity" or None,
+    to choose which learned clauses survive when their database is halved.
+
+    The engine is kept between calls (unless preprocess is used, or mode
+    is "portfolio"), together with its learned clauses and heuristic
+    state, and clauses can be added in between with add_clause; heuristic
+    and phase_saving only matter for the first call.  In "cdcl" mode,
+    assumptions is a list of literals that must hold in this call only;
+    if the problem is unsatisfiable under them, self.core is set to the
+    assumptions responsible.
+    The work done is counted in self.stats, a SolverStats; in "dpll" and
+    "cdcl" modes, if progress is given, progress(self.stats) is called
+    every progress_interval conflicts.
+    In "cdcl" mode without preprocessing, proof can be a DratWriter or a
+    file name, where a DRAT proof of unsatisfiability is written.  The
+    engine is then built anew, since the clauses learned by earlier
+    solves are not in the proof, so the proof can be checked with
+    check_drat against the current clauses of the instance (self.arena,
+    with those added by add_clause).
+    Returns the assignment as a list of literals, or False if the
+    SAT problem cannot be satisfied."""
+    assert mode in ("dpll", "cdcl", "portfolio", "walksat", "probsat"), \
+        "Unknown solver mode: {}".format(mode)
+    assert not assumptions or (mode == "cdcl" and not preprocess), \
+        "Assumptions need the cdcl mode, without preprocessing."
+    assert proof is None or (mode == "cdcl" and not preprocess), \
+        "Proofs need the cdcl mode, without preprocessing."
+    if isinstance(proof, str):
+        with DratWriter(proof) as writer:
+            return self.solve(
+                mode=mode, heuristic=heuristic, restarts=restarts,
+                phase_saving=phase_saving, reduce=reduce,
+                assumptions=assumptions, progress=progress,
+                progress_interval=progress_interval, proof=writer)
+    self.core = []
     if self.isfalse:
         return False
-    elif self.istrue:
-        return
-
-    assignments = self.generate_candidate_assignments()
-    hasSolution = False
-    appliedAssignments = []
-    newSAT = self
-    while hasSolution == False:
-        assignments = newSAT.generate_candidate_assignments()
-        print("ASSIGNMENTS")
-        print(assignments)
-        print("literals")
-        if assignments == frozenset({1, -3}):
-            return [1, 2, 3]
-        if newSAT.isfalse:
-            return False
-        if len(assignments) == 0:
-            return appliedAssignments
-        for assignment in assignments:
-            newSAT = newSAT.apply_assignment(assignment)
-
-            # if not newNewSAT.isfalse:
-            # newSAT = newSAT.apply_assignment(assignment)
-            if assignment not in appliedAssignments and -(assignment) not in appliedAssignments:
-                appliedAssignments.append(assignment)
+    elif self.istrue and not assumptions:
+        return []
+    stats = self.stats
+    clauses = self.arena
+    if preprocess:
+        with stats.phase("preprocess"):
+            preprocessor = Preprocessor(self.arena)
+            if not preprocessor.run():
+                return False
+            clauses = preprocessor.remaining()
+    if mode == "portfolio":
+        with stats.phase("search"):
+            model = solve_portfolio(clauses, workers=workers)
+    elif mode in ("walksat", "probsat"):
+        with stats.phase("load"):
+            local_search = LocalSearch(clauses, seed=seed)
+        with stats.phase("search"):
+            model = local_search.run(mode, max_flips=max_flips,
+                                     timeout=timeout)
+        stats.flips += local_search.flips
+    else:
+        with stats.phase("load"):
+            if preprocess:
+                engine = PropagationEngine(clauses, heuristic=heuristic,
+                                           phase_saving=phase_saving,
+                                           stats=stats)
             else:
-                return appliedAssignments
-
-    return False
+                if self.engine is None or proof is not None:
+                    self.engine = PropagationEngine(
+                        clauses, heuristic=heuristic,
+                        phase_saving=phase_saving, stats=stats)
+                engine = self.engine
+        with stats.phase("search"):
+            if mode == "cdcl":
+                engine.proof = proof
+                try:
+                    model = engine.cdcl(assumptions=list(assumptions),
+                                        restarts=restarts, reduce=reduce,
+                                        progress=progress,
+                                        progress_interval=progress_interval)
+                finally:
+                    engine.proof = None
+                self.core = engine.core
+            else:
+                model = engine.dpll(progress=progress,
+                                    progress_interval=progress_interval)
+    if preprocess and model not in (False, UNKNOWN):
+        model = preprocessor.extend_model(model)
+    return model
 
 
 SAT.solve = sat_solve
 
 
-def sat_verify_assignment(self, assignment):
-    assert not has_pos_and_neg(assignment), "The assignment is inconsistent"
-    s = self
-    for i in assignment:
-        s = s.apply_assignment(i)
-        if s.istrue:
-            return True
-        if s.isfalse:
+### Model enumeration and counting
+
+def sat_enumerate_models(self, projection=None, limit=None):
+    """Generates the models of the instance, each once, as lists of
+    literals sorted by variable.  If projection is given, it is an
+    iterable of variables, and the models are restricted to them (each
+    restriction is generated once).  At most limit models are generated.
+    The models are found in cdcl mode by a PropagationEngine of their own,
+    which keeps its learned clauses from one model to the next.  After
+    each model, a clause excluding it is added: the negation of the
+    decisions that led to it, so that the search only backtracks by one
+    level (see PropagationEngine.block_model), or of its projection."""
+    engine = PropagationEngine(self.arena, stats=self.stats)
+    if projection is not None:
+        projection = set(projection)
+        for v in projection:
+            engine.add_variable(v)
+    count = 0
+    while limit is None or count < limit:
+        with self.stats.phase("search"):
+            model = engine.cdcl(resume=True)
+        if model is False:
+            return
+        if projection is None:
+            yield model
+            if not engine.block_model():
+                return
+        else:
+            model = [l for l in model if abs(l) in projection]
+            yield model
+            if not model or not engine.add_clause([-l for l in model]):
+                return
+        count += 1
+
+SAT.enumerate_models = sat_enumerate_models
+
+
+def condition(clauses, literals):
+    """Makes the literals true in the clauses, and propagates the resulting
+    unit clauses.  Returns the remaining clauses and the set of true
+    literals, or None if a clause becomes false."""
+    true = set(literals)
+    false = {-l for l in true}
+    while True:
+        units = []
+        remaining = []
+        for c in clauses:
+            if len(c) > 1 and false.isdisjoint(c):
+                # It may be satisfied: this is checked at the end.
+                remaining.append(c)
+                continue
+            if not true.isdisjoint(c):
+                continue
+            c = tuple(l for l in c if l not in false)
+            if len(c) > 1:
+                remaining.append(c)
+            elif c:
+                units.append(c[0])
+            else:
+                return None
+        if not units:
+            return [c for c in remaining if true.isdisjoint(c)], true
+        for l in units:
+            if l in false:
+                return None
+            true.add(l)
+            false.add(-l)
+        clauses = remaining
+
+
+class ModelCounter(object):
+    """Exact model counting (#SAT), by search with unit propagation.  The
+    clauses are split into connected components, which share no variable,
+    and whose counts multiply.  The count of each component is cached,
+    keyed by a digest of its clauses, since the same component is often
+    reached by different partial assignments."""
+
+    def __init__(self, clauses, cache_budget=1 << 26):
+        """clauses is an iterable of iterables of literals.  The counts of
+        the components used most recently are kept, within roughly
+        cache_budget bytes."""
+        self.clauses = [tuple(sorted(set(c))) for c in clauses]
+        self.clauses = [c for c in self.clauses
+                        if not any(-l in c for l in c)]
+        self.cache = OrderedDict()  # Digest -> count, oldest first.
+        self.cache_budget = cache_budget
+        self.cache_bytes = 0
+        self.cache_hits = 0
+        self.decisions = 0
+
+    def count(self, variables=None):
+        """Returns the number of models on the variables of the clauses,
+        together with variables (an iterable) if given."""
+        scope = {abs(l) for c in self.clauses for l in c}
+        if variables is not None:
+            scope.update(variables)
+        result = condition(self.clauses, ())
+        if result is None:
+            return 0
+        remaining, true = result
+        free = scope - {abs(l) for l in true} - \
+            {abs(l) for c in remaining for l in c}
+        return self.count_components(remaining) << len(free)
+
+    def count_components(self, clauses):
+        """Returns the number of models of clauses on their variables.  The
+        search keeps its own stack, since it can go as deep as there are
+        variables.  A product frame [components, product, free] multiplies
+        the counts of the components of the clauses left by a branch, and
+        shifts the product by the number of free variables; a component
+        frame [key, clauses, v, size, branch, total] sums the counts of
+        the branches v and -v of a component of size variables.  value is
+        the count returned by the frame popped last."""
+        stack = [[iter(components(clauses)), 1, 0]]
+        value = None
+        while stack:
+            frame = stack[-1]
+            if len(frame) == 3:
+                if value is not None:
+                    frame[1] *= value
+                    value = None
+                component = next(frame[0], None) if frame[1] else None
+                if component is None:
+                    value = frame[1] << frame[2]
+                    stack.pop()
+                    continue
+                key = component_key(component)
+                if key in self.cache:
+                    self.cache_hits += 1
+                    self.cache.move_to_end(key)
+                    value = self.cache[key]
+                    continue
+                occurrences = defaultdict(int)
+                for c in component:
+                    for l in c:
+                        occurrences[abs(l)] += 1
+                v = max(occurrences, key=occurrences.__getitem__)
+                self.decisions += 1
+                stack.append([key, component, v, len(occurrences), 0, 0])
+                continue
+            key, component, v, size, branch, total = frame
+            if value is not None:
+                frame[5] = total = total + value
+                value = None
+            if branch == 2:
+                self.cache_count(key, total)
+                value = total
+                stack.pop()
+                continue
+            frame[4] = branch + 1
+            result = condition(component, (v if branch == 0 else -v,))
+            if result is None:
+                continue
+            remaining, true = result
+            # The variables gone from the component without a value are
+            # free.
+            free = size - len(true) - \
+                len({abs(m) for c in remaining for m in c})
+            stack.append([iter(components(remaining)), 1, free])
+        return value
+
+    def cache_count(self, key, count):
+        """Caches the count of a component, evicting the least recently
+        used counts while the cache is over budget."""
+        self.cache[key] = count
+        self.cache_bytes += cache_entry_size(key, count)
+        while self.cache_bytes > self.cache_budget and len(self.cache) > 1:
+            old, old_count = self.cache.popitem(last=False)
+            self.cache_bytes -= cache_entry_size(old, old_count)
+
+
+def component_key(clauses):
+    """Returns a 16-byte digest of a set of clauses (each a tuple of
+    sorted literals), whatever their order."""
+    return hashlib.blake2b(repr(sorted(clauses)).encode(),
+                           digest_size=16).digest()
+
+
+def cache_entry_size(key, count):
+    """Estimates the bytes taken by a cache entry: its key and count, and
+    about 100 bytes of OrderedDict bookkeeping."""
+    return sys.getsizeof(key) + sys.getsizeof(count) + 100
+
+
+def components(clauses):
+    """Generates the connected components of clauses, as lists of clauses:
+    two clauses are connected if they share a variable."""
+    parent = {}
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+    for c in clauses:
+        for l in c:
+            parent.setdefault(abs(l), abs(l))
+        root = find(abs(c[0]))
+        for l in c[1:]:
+            other = find(abs(l))
+            if other != root:
+                parent[other] = root
+    groups = defaultdict(list)
+    for c in clauses:
+        groups[find(abs(c[0]))].append(c)
+    return groups.values()
+
+
+def sat_count_models(self, variables=None):
+    """Returns the number of models of the instance, on the variables of
+    its clauses, together with variables if given; see ModelCounter."""
+    return ModelCounter(self.arena).count(variables)
+
+SAT.count_models = sat_count_models
+
+
+### DIMACS input and output
+
+def open_dimacs(path, mode="rb"):
+    """Opens a DIMACS file, decompressing it on the fly if its name ends
+    in .gz, .xz or .bz2."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".xz"):
+        return lzma.open(path, mode)
+    if path.endswith(".bz2"):
+        return bz2.open(path, mode)
+    return open(path, mode)
+
+
+def parse_dimacs(lines):
+    """Generates the clauses found in the lines (as bytes) of a DIMACS CNF
+    file.  Clauses may span several lines, and end with 0."""
+    clause = []
+    for line in lines:
+        tokens = line.split()
+        if not tokens or tokens[0] in (b"c", b"p"):
+            continue
+        if tokens[0] == b"%":
+            # Some benchmark sets end the clauses with a % line.
+            break
+        for t in tokens:
+            l = int(t)
+            if l == 0:
+                yield clause
+                clause = []
+            else:
+                clause.append(l)
+    if clause:
+        yield clause
+
+
+def read_dimacs(path):
+    """Generates the clauses of a DIMACS CNF file, one list of literals at
+    a time, so that the file never needs to be held in memory.
+    Uncompressed files are read through mmap."""
+    with open_dimacs(path) as f:
+        if isinstance(f, (gzip.GzipFile, lzma.LZMAFile, bz2.BZ2File)):
+            yield from parse_dimacs(f)
+        elif os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                yield from parse_dimacs(iter(m.readline, b""))
+
+
+def write_dimacs(path, clauses, num_vars=None):
+    """Writes clauses (an iterable of iterables of literals) to a DIMACS CNF
+    file, compressed according to the extension of path as in
+    open_dimacs."""
+    if not hasattr(clauses, "__len__"):
+        clauses = list(clauses)
+    if num_vars is None:
+        num_vars = max((abs(l) for c in clauses for l in c), default=0)
+    with open_dimacs(path, "wt") as f:
+        f.write("p cnf {} {}\n".format(num_vars, len(clauses)))
+        for c in clauses:
+            f.write(" ".join(map(str, c)))
+            f.write(" 0\n" if c else "0\n")
+
+
+def sat_from_dimacs(path):
+    """Builds a SAT problem by streaming the clauses of a DIMACS file."""
+    return SAT(read_dimacs(path))
+
+
+def sat_to_dimacs(self, path):
+    """Writes the (simplified) clauses of the problem to a DIMACS file."""
+    write_dimacs(path, self.arena)
+
+
+SAT.from_dimacs = staticmethod(sat_from_dimacs)
+SAT.to_dimacs = sat_to_dimacs
+
+
+### DRAT proofs
+
+class DratWriter(object):
+    """Writes a DRAT proof: the clauses learned by the solver, and the ones
+    it deletes, in the text format ("1 -2 0", "d 1 -2 0") or in the binary
+    one (a or d, then each literal l as a variable-length unsigned integer
+    2 * |l| + (l < 0), then 0).  Output is collected in a buffer, and only
+    written out once it holds buffer_size bytes."""
+
+    def __init__(self, path, binary=False, buffer_size=1 << 16):
+        self.file = open(path, "wb")
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+
+    def write(self, prefix, literals):
+        buffer = self.buffer
+        if self.binary:
+            buffer += prefix
+            for l in literals:
+                u = 2 * abs(l) + (l < 0)
+                while u > 127:
+                    buffer.append(u & 127 | 128)
+                    u >>= 7
+                buffer.append(u)
+            buffer.append(0)
+        else:
+            if prefix == b"d":
+                buffer += b"d "
+            for l in literals:
+                buffer += b"%d " % l
+            buffer += b"0\n"
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def add(self, literals):
+        self.write(b"a", literals)
+
+    def delete(self, literals):
+        self.write(b"d", literals)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_drat(path):
+    """Generates the steps of a DRAT proof file, as pairs (deleted,
+    literals).  Binary proofs are recognized by their first bytes."""
+    with open(path, "rb") as f:
+        data = f.read()
+    text = set(b"0123456789-d c\r\n\t")
+    if any(b not in text for b in data[:64]):
+        i = 0
+        while i < len(data):
+            deleted = data[i] == ord("d")
+            i += 1
+            literals = []
+            u = shift = 0
+            while True:
+                b = data[i]
+                i += 1
+                u |= (b & 127) << shift
+                shift += 7
+                if b < 128:
+                    if u == 0:
+                        break
+                    literals.append(-(u >> 1) if u & 1 else u >> 1)
+                    u = shift = 0
+            yield deleted, literals
+    else:
+        for line in data.splitlines():
+            tokens = line.split()
+            if not tokens or tokens[0] == b"c":
+                continue
+            deleted = tokens[0] == b"d"
+            if deleted:
+                tokens = tokens[1:]
+            yield deleted, [int(t) for t in tokens[:-1]]
+
+
+class DratChecker(object):
+    """Checks a DRAT refutation of a CNF by backward checking with core
+    marking.  The proof is first replayed forward, to know which clauses
+    are present at each step.  Then, starting from the empty clause, the
+    lemmas are undone from last to first; only the lemmas marked as used
+    (the core) are checked, each by reverse unit propagation (RUP) or,
+    failing that, as a resolution asymmetric tautology (RAT) on its first
+    literal, and the clauses used by each successful check are marked in
+    turn.  Clauses are never removed from the watch lists: deleted and
+    not-yet-added clauses are simply inactive, and skipped."""
+
+    def __init__(self, clauses, steps):
+        """clauses is the CNF, an iterable of iterables of literals, and
+        steps the proof, as generated by read_drat."""
+        self.clauses = []  # Literal lists; the first two are watched.
+        self.active = []
+        self.marked = []
+        self.watches = defaultdict(list)
+        self.units = []  # Clauses of length one.
+        self.steps = []  # (clause, deleted), up to the empty clause.
+        self.num_original = 0
+        self.checked = 0  # Number of lemmas checked.
+        by_literals = defaultdict(list)  # Sorted literals -> active clauses.
+        num_vars = 0
+        for c in clauses:
+            c = self.add(c)
+            by_literals[tuple(sorted(self.clauses[c]))].append(c)
+            num_vars = max(num_vars, max(map(abs, self.clauses[c]), default=0))
+        self.num_original = len(self.clauses)
+        self.refuted = any(len(c) == 0 for c in self.clauses)
+        for deleted, literals in steps:
+            if self.refuted:
+                break
+            key = tuple(sorted(set(literals)))
+            if deleted:
+                if by_literals[key]:
+                    c = by_literals[key].pop()
+                    self.active[c] = False
+                    self.steps.append((c, True))
+                continue
+            c = self.add(literals)
+            by_literals[key].append(c)
+            self.steps.append((c, False))
+            num_vars = max(num_vars, max(map(abs, literals), default=0))
+            if not literals:
+                self.refuted = True
+        size = num_vars + 1
+        self.value = [0] * size
+        self.reason = [None] * size
+        self.seen = [False] * size
+        self.trail = []
+
+    def add(self, literals):
+        c = len(self.clauses)
+        literals = list(dict.fromkeys(literals))
+        self.clauses.append(literals)
+        self.active.append(True)
+        self.marked.append(False)
+        if len(literals) == 1:
+            self.units.append(c)
+        elif len(literals) > 1:
+            self.watches[literals[0]].append(c)
+            self.watches[literals[1]].append(c)
+        return c
+
+    def assign(self, l, reason):
+        self.value[abs(l)] = l
+        self.reason[abs(l)] = reason
+        self.trail.append(l)
+
+    def reset(self):
+        for l in self.trail:
+            self.value[abs(l)] = 0
+            self.reason[abs(l)] = None
+        self.trail = []
+
+    def propagate(self):
+        """Unit propagation over the active clauses, starting with the
+        active unit clauses.  Returns a conflicting clause, or None."""
+        value = self.value
+        clauses = self.clauses
+        active = self.active
+        for c in self.units:
+            if active[c]:
+                l = clauses[c][0]
+                if value[abs(l)] == -l:
+                    return c
+                if value[abs(l)] == 0:
+                    self.assign(l, c)
+        head = 0
+        trail = self.trail
+        watches = self.watches
+        while head < len(trail):
+            false_lit = -trail[head]
+            head += 1
+            watching = watches[false_lit]
+            kept = []
+            for i, c in enumerate(watching):
+                if not active[c]:
+                    kept.append(c)
+                    continue
+                lits = clauses[c]
+                if lits[0] == false_lit:
+                    lits[0], lits[1] = lits[1], false_lit
+                first = lits[0]
+                if value[abs(first)] != first:
+                    for k in range(2, len(lits)):
+                        l = lits[k]
+                        if value[abs(l)] != -l:
+                            lits[1], lits[k] = l, false_lit
+                            watches[l].append(c)
+                            break
+                    else:
+                        kept.append(c)
+                        if value[abs(first)] == -first:
+                            kept.extend(watching[i + 1:])
+                            watches[false_lit] = kept
+                            return c
+                        self.assign(first, c)
+                        continue
+                    continue
+                kept.append(c)
+            watches[false_lit] = kept
+        return None
+
+    def mark_conflict(self, conflict):
+        """Marks the conflicting clause, and the reasons it depends on."""
+        stack = [conflict]
+        seen = self.seen
+        visited = []
+        while stack:
+            c = stack.pop()
+            self.marked[c] = True
+            for l in self.clauses[c]:
+                v = abs(l)
+                if not seen[v] and self.reason[v] is not None:
+                    seen[v] = True
+                    visited.append(v)
+                    stack.append(self.reason[v])
+        for v in visited:
+            seen[v] = False
+
+    def rup(self, literals):
+        """Checks whether propagating the negation of literals yields a
+        conflict, and if so, marks the clauses used."""
+        for l in literals:
+            if self.value[abs(l)] == l:
+                # The clause is a tautology.
+                self.reset()
+                return True
+            if self.value[abs(l)] == 0:
+                self.assign(-l, None)
+        conflict = self.propagate()
+        if conflict is not None:
+            self.mark_conflict(conflict)
+        self.reset()
+        return conflict is not None
+
+    def rat(self, literals):
+        """Checks the RAT property on the first literal: every resolvent
+        with an active clause containing its negation must be RUP."""
+        if not literals:
             return False
-    return False
-
-SAT.verify_assignment = sat_verify_assignment
-
+        pivot = literals[0]
+        for c, d in enumerate(self.clauses):
+            if self.active[c] and -pivot in d:
+                if not self.rup(literals + [l for l in d if l != -pivot]):
+                    return False
+                self.marked[c] = True
+        return True
 
-### 5 points: A solvable problem
+    def check(self):
+        """Returns True if the proof refutes the CNF."""
+        if any(len(c) == 0 for c in self.clauses[:self.num_original]):
+            return True
+        if not self.rup([]):
+            return False
+        for c, deleted in reversed(self.steps):
+            if deleted:
+                self.active[c] = True
+                continue
+            self.active[c] = False
+            if self.marked[c]:
+                self.checked += 1
+                literals = list(self.clauses[c])
+                if not (self.rup(literals) or self.rat(literals)):
+                    return False
+        return True
 
-s = SAT([[1, 2], [-2, 2, 3], [-3, -2]])
-a = s.solve()
-print("Assignment:", a)
 
-### 5 points: Yet another solvable problem
+def check_drat(clauses, proof_path):
+    """Checks the DRAT proof in proof_path against the CNF given by
+    clauses (an iterable of iterables of literals).  Returns True if it
+    is a valid refutation."""
+    return DratChecker(clauses, read_drat(proof_path)).check()
 
-s = SAT([[-1, 2], [-2, 3], [-3, 1]])
-a = s.solve()
-print("Assignment:", a)
 
-### 5 points: An unsolvable problem
+def has_pos_and_neg(assignment):
+    """Returns True if the assignment contains both a literal and its
+    complement."""
+    literals = set(assignment)
+    return any(-l in literals for l in literals)
 
-s = SAT([[1], [-1, 2], [-2]])
 
+def sat_verify_assignment(self, assignment):
+    assert not has_pos_and_neg(assignment), "The assignment is inconsistent"
+    satisfied, _ = self.verify_assignments([assignment])
+    return bool(satisfied[0])
 
+SAT.verify_assignment = sat_verify_assignment
 
-### 5 points: Another unsolvable problem
 
-s = SAT([[-1, 2], [-2, 3], [-3, -1], [1]])
\ No newline at end of file
+### Batch verification
+
+def sat_literal_matrix(self):
+    """Returns the clauses as a NumPy matrix with one row per clause, in
+    arena order, padded with zeros to the length of the longest clause."""
+    arena = self.arena
+    lengths = np.frombuffer(arena.lengths, dtype=np.int32)
+    width = int(lengths.max()) if len(lengths) else 0
+    matrix = np.zeros((len(lengths), width), dtype=np.int32)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.frombuffer(arena.starts, dtype=np.int64)
+    columns = np.arange(len(arena.lits)) - np.repeat(starts, lengths)
+    matrix[rows, columns] = np.frombuffer(arena.lits, dtype=np.int32)
+    return matrix
+
+
+def sat_verify_assignments(self, assignments, block_size=1 << 24):
+    """Checks K assignments at once.  assignments is a list of K lists of
+    literals, or a K x n NumPy matrix of literals padded with zeros.
+    Unassigned variables make none of their literals true.
+    Returns two NumPy arrays of length K: whether each assignment
+    satisfies every clause, and the index (in arena order) of the first
+    clause it violates, or -1.  The assignments are checked a chunk of
+    rows at a time, and the clauses a block at a time, so that the
+    intermediate arrays have at most about block_size entries (or those
+    of one assignment against one clause, if that is more)."""
+    clauses = self.literal_matrix()
+    clause_vars = int(np.abs(clauses).max(initial=0))
+    literal_index = 2 * np.abs(clauses) + (clauses < 0)
+    width = max(1, clauses.shape[1])
+    k = len(assignments)
+    first_violated = np.full(k, -1, dtype=np.int64)
+    if not isinstance(assignments, np.ndarray):
+        length = max((len(a) for a in assignments), default=0)
+    else:
+        length = assignments.shape[1] if assignments.ndim == 2 else 0
+    # Each row takes a padded copy of its assignment, its table of true
+    # literals, and at least one clause of the block.
+    rows = max(1, block_size // (length + 2 * clause_vars + 2 + width))
+    for first in range(0, k, rows):
+        chunk = assignments[first:first + rows]
+        if not isinstance(chunk, np.ndarray) or chunk.ndim != 2:
+            padded = np.zeros((len(chunk), length), dtype=np.int64)
+            for i, a in enumerate(chunk):
+                padded[i, :len(a)] = list(a)
+            chunk = padded
+        chunk = chunk.astype(np.int64, copy=False)
+        # Variables in no clause cannot satisfy any: they are dropped, like
+        # the padding, so that the table below stays as small.
+        chunk = np.where(np.abs(chunk) > clause_vars, 0, chunk)
+        # true[i, 2 * v] and true[i, 2 * v + 1] say whether assignment i
+        # makes v and -v true; the padding (variable 0) is never true.
+        true = np.zeros((len(chunk), 2 * clause_vars + 2), dtype=bool)
+        index = 2 * np.abs(chunk) + (chunk < 0)
+        true[np.arange(len(chunk))[:, None], index] = True
+        true[:, :2] = False
+        assert not (true[:, 2::2] & true[:, 3::2]).any(), \
+            "An assignment is inconsistent"
+        result = first_violated[first:first + rows]
+        step = max(1, block_size // (len(chunk) * width))
+        for start in range(0, len(clauses), step):
+            block = literal_index[start:start + step]
+            violated = ~true[:, block].any(axis=2)
+            pending = (result < 0) & violated.any(axis=1)
+            result[pending] = start + violated[pending].argmax(axis=1)
+    return first_violated < 0, first_violated
+
+
+SAT.literal_matrix = sat_literal_matrix
+SAT.verify_assignments = sat_verify_assignments
+
+
+if __name__ == "__main__":
+
+    ### 5 points: A solvable problem
+
+    s = SAT([[1, 2], [-2, 2, 3], [-3, -2]])
+    a = s.solve()
+    print("Assignment:", a)
+
+    ### 5 points: Yet another solvable problem
+
+    s = SAT([[-1, 2], [-2, 3], [-3, 1]])
+    a = s.solve()
+    print("Assignment:", a)
+
+    ### 5 points: An unsolvable problem
+
+    s = SAT([[1], [-1, 2], [-2]])
+
+
+
+    ### 5 points: Another unsolvable problem
+
+    s = SAT([[-1, 2], [-2, 3], [-3, -1], [1]])
@@ -1,97 +1,1222 @@
-from collections import defaultdict
+from array import array
+import bisect
+import csv
+import heapq
+import itertools
+import mmap
+import multiprocessing
+import struct
+import sys
+from collections import OrderedDict, defaultdict
+from multiprocessing import shared_memory
+
+import numpy as np
 
 # This is infinity.  Not kidding.
 INFINITY = float("inf")
 
 
+class FrozenGraph(object):
+    """The edges of a PricedGraph in compressed sparse row (CSR) form.
+    Nodes are numbered from 0 in nodes, and index maps them back to their
+    number.  The successors of node i are targets[offsets[i]:offsets[i + 1]],
+    reached at the costs in the same slice of costs; the predecessors are
+    stored the same way in reverse_offsets, sources and reverse_costs.
+    Each edge takes 12 bytes in each direction, instead of the sets, tuple
+    and dictionary entries of PricedGraph."""
+
+    def __init__(self, nodes, x, y, costs):
+        """nodes is the list of nodes, and the edges go from nodes[x[k]] to
+        nodes[y[k]] at costs[k]: x and y are int32 arrays, and costs a
+        float64 array."""
+        self.nodes = nodes
+        self.index = {v: i for i, v in enumerate(nodes)}
+        self.offsets, self.targets, self.costs = csr(len(nodes), x, y, costs)
+        self.reverse_offsets, self.sources, self.reverse_costs = csr(
+            len(nodes), y, x, costs)
+
+    @staticmethod
+    def from_arrays(nodes, index, arrays):
+        """Returns the FrozenGraph with the given nodes, index, and arrays
+        (offsets, targets, costs, reverse_offsets, sources, reverse_costs),
+        which are used as they are, without copies."""
+        frozen = FrozenGraph.__new__(FrozenGraph)
+        frozen.nodes = nodes
+        frozen.index = index
+        (frozen.offsets, frozen.targets, frozen.costs, frozen.reverse_offsets,
+         frozen.sources, frozen.reverse_costs) = arrays
+        return frozen
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node_list(self, numbers):
+        """Returns the list of the nodes numbered numbers."""
+        if isinstance(self.nodes, NodeTable):
+            return self.nodes.take(numbers)
+        nodes = self.nodes
+        return [nodes[i] for i in numbers]
+
+    def edges(self):
+        """Generates the edges as (x, y, cost), with nodes."""
+        nodes = self.node_list(range(len(self)))
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        costs = self.costs.tolist()
+        for i, x in enumerate(nodes):
+            for k in range(offsets[i], offsets[i + 1]):
+                yield x, nodes[targets[k]], costs[k]
+
+    def nbytes(self):
+        """The size of the arrays, in bytes."""
+        return sum(a.nbytes for a in (
+            self.offsets, self.targets, self.costs, self.reverse_offsets,
+            self.sources, self.reverse_costs))
+
+
+def csr(n, x, y, costs):
+    """Returns the arrays (offsets, targets, costs) of the edges from x[k]
+    to y[k], for n nodes."""
+    order = np.argsort(x, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(x, minlength=n), out=offsets[1:])
+    return offsets, y[order], costs[order]
+
+
+class PathTree(object):
+    """The cheapest paths from every node to a target z: cost[x] is the cost
+    of going from x to z, and next_hop[x] the node after x on a cheapest
+    path.  Nodes that cannot reach z are in neither dictionary."""
+
+    def __init__(self, target, cost, next_hop):
+        self.target = target
+        self.cost = cost
+        self.next_hop = next_hop
+
+    def __contains__(self, x):
+        return x in self.cost
+
+    def __len__(self):
+        return len(self.cost)
+
+    def path(self, w):
+        """Returns the cheapest path from w to the target, as a list
+        beginning with w and ending with the target, or None if there is
+        none."""
+        if w not in self.cost:
+            return None
+        path = [w]
+        next_hop = self.next_hop
+        while w != self.target:
+            w = next_hop[w]
+            path.append(w)
+        return path
+
+    def nbytes(self):
+        """An estimate of the memory taken, not counting the nodes."""
+        return (sys.getsizeof(self.cost) + sys.getsizeof(self.next_hop) +
+                24 * len(self.cost))
+
+
+def search_rows(offsets, neighbours, costs, starts, goals):
+    """Runs Dijkstra's algorithm over CSR arrays from each of starts (node
+    numbers), until all goals are settled.  Returns, for each start, the
+    list of the costs of reaching the goals.  Unknown nodes are -1.  Only
+    the edges of the settled nodes are read, one slice per node."""
+    rows = []
+    wanted = set(goals) - {-1}
+    for start in starts:
+        pointCost = {start: 0}
+        settled = set()
+        remaining = len(wanted)
+        frontier = [(0, start)] if start >= 0 else []
+        while frontier and remaining:
+            currentCost, x = heapq.heappop(frontier)
+            if x in settled:
+                continue
+            settled.add(x)
+            if x in wanted:
+                remaining -= 1
+            begin, end = offsets[x], offsets[x + 1]
+            for y, edgeCost in zip(neighbours[begin:end].tolist(),
+                                   costs[begin:end].tolist()):
+                newCost = currentCost + edgeCost
+                if newCost < pointCost.get(y, INFINITY):
+                    pointCost[y] = newCost
+                    heapq.heappush(frontier, (newCost, y))
+        rows.append([pointCost.get(g, INFINITY) if g in settled else INFINITY
+                     for g in goals])
+    return rows
+
+
+# The CSR arrays of a worker of parallel_search_rows, and the shared
+# memory blocks they are views of (which must stay open).
+worker_arrays = None
+worker_blocks = None
+
+
+def attach_shared_arrays(specs):
+    """Initializes a worker of parallel_search_rows: maps the arrays from
+    the shared memory blocks described by specs, (name, dtype, length),
+    without copying them."""
+    global worker_arrays, worker_blocks
+    worker_arrays = []
+    worker_blocks = []
+    for name, dtype, length in specs:
+        block = shared_memory.SharedMemory(name=name)
+        worker_blocks.append(block)
+        worker_arrays.append(np.ndarray(length, dtype=dtype,
+                                        buffer=block.buf))
+
+
+def search_chunk(arguments):
+    starts, goals = arguments
+    return search_rows(*worker_arrays, starts, goals)
+
+
+def parallel_search_rows(arrays, starts, goals, workers):
+    """search_rows, with the starts split among a pool of workers that
+    read the arrays from shared memory."""
+    blocks = []
+    try:
+        specs = []
+        for a in arrays:
+            block = shared_memory.SharedMemory(create=True,
+                                               size=max(a.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(len(a), dtype=a.dtype, buffer=block.buf)[:] = a
+            specs.append((block.name, a.dtype.str, len(a)))
+        size = -(-len(starts) // workers)
+        chunks = [(starts[i:i + size], goals)
+                  for i in range(0, len(starts), size)]
+        with multiprocessing.Pool(workers, initializer=attach_shared_arrays,
+                                  initargs=(specs,)) as pool:
+            return [row for rows in pool.map(search_chunk, chunks)
+                    for row in rows]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
 class PricedGraph(object):
 
-    def __init__(self):
+    def __init__(self, cache_budget=1 << 28):
+        """The costs computed for the targets used most recently are kept,
+        within roughly cache_budget bytes, and repaired when edges change."""
         self.s = defaultdict(set)  # Successors
         self.p = defaultdict(set)  # Predecessors
         self.c = {}  # Cost of edges
         # Below you can put any other initialization you think is necessary.
         # YOUR CODE HERE
-        self.pointCost = {}
+        self.pointCost = {}  # Cost to the last target, of the nodes reaching it.
+        self.frozen = None  # FrozenGraph, while the graph is frozen.
+        self.tree = None  # PathTree of the last compute_cost.
+        self.trees = OrderedDict()  # Target -> its PathTree, oldest first.
+        self.tree_bytes = {}  # Target -> estimated size of its tree.
+        self.cache_budget = cache_budget
+        self.cache_bytes = 0
+        self.cache_hits = 0
+        self.settled = 0  # Nodes settled by the last bidirectional search.
+        # Built from the edges when needed, and dropped when they change.
+        self.snapshot_graph = None  # FrozenGraph of the dictionaries.
+        self.hierarchy = None  # ContractionHierarchy, for cost_matrix.
 
     def add_edge(self, x, y, c):
         """Adds an edge from x to y with cost c."""
         assert c > 0, "Costs need to be strictly positive."
+        if self.frozen is not None:
+            self.thaw()
+        old = self.c.get((x, y), INFINITY)
         self.s[x].add(y)
         self.p[y].add(x)
         self.c[(x, y)] = c
         # Below, you can put any other thing you like to do.
         # YOUR CODE HERE
-        if x not in self.pointCost:
-            self.pointCost[x] = INFINITY
+        self.snapshot_graph = self.hierarchy = None
+        self.repair_trees(x, y, old, c)
+
+    def update_edge(self, x, y, c):
+        """Changes the cost of the edge from x to y to c."""
+        assert self.has_edge(x, y), "No edge from {!r} to {!r}.".format(x, y)
+        self.add_edge(x, y, c)
+
+    def remove_edge(self, x, y):
+        """Removes the edge from x to y."""
+        assert self.has_edge(x, y), "No edge from {!r} to {!r}.".format(x, y)
+        if self.frozen is not None:
+            self.thaw()
+        old = self.c.pop((x, y))
+        self.s[x].discard(y)
+        self.p[y].discard(x)
+        self.snapshot_graph = self.hierarchy = None
+        self.repair_trees(x, y, old, INFINITY)
+
+    def has_edge(self, x, y):
+        if self.frozen is not None:
+            return any(v == y for v, _ in self.successors(x))
+        return (x, y) in self.c
+
+    def freeze(self):
+        """Compiles the graph into a FrozenGraph, over which compute_cost
+        and cheapest_path then run.  To save memory, the dictionaries s, p
+        and c are dropped (set to None) while the graph is frozen; adding
+        an edge thaws it."""
+        if self.frozen is not None:
+            return self.frozen
+        self.frozen = self.snapshot()
+        self.snapshot_graph = None
+        self.s = self.p = self.c = None
+        return self.frozen
 
-        if y not in self.pointCost:
-            self.pointCost[y] = INFINITY
+    def snapshot(self):
+        """Returns a FrozenGraph of the current edges, without freezing the
+        graph (or the FrozenGraph itself, if it is frozen).  It is kept
+        until an edge changes."""
+        if self.frozen is not None:
+            return self.frozen
+        if self.snapshot_graph is None:
+            nodes = list(set(self.s) | set(self.p))
+            index = {x: i for i, x in enumerate(nodes)}
+            # The arrays are filled straight from the dictionary, without a
+            # list of the edges.
+            m = len(self.c)
+            x = np.fromiter((index[x] for x, _ in self.c), dtype=np.int32,
+                            count=m)
+            y = np.fromiter((index[y] for _, y in self.c), dtype=np.int32,
+                            count=m)
+            costs = np.fromiter(self.c.values(), dtype=np.float64, count=m)
+            self.snapshot_graph = FrozenGraph(nodes, x, y, costs)
+        return self.snapshot_graph
+
+    def thaw(self):
+        """Rebuilds the dictionaries of a frozen graph, and drops the
+        FrozenGraph."""
+        frozen, self.frozen = self.frozen, None
+        self.s = defaultdict(set)
+        self.p = defaultdict(set)
+        self.c = {}
+        for x, y, c in frozen.edges():
+            self.s[x].add(y)
+            self.p[y].add(x)
+            self.c[(x, y)] = c
 
     def compute_cost(self, z):
         """Computes the minimum cost of reaching z from every node.
-        Store this somewhere."""
-        # YOUR CODE HERE
-        for point in self.pointCost:
-            self.pointCost[point] = INFINITY
-
-        checkPoints = [z]
-
-        self.pointCost[z] = 0
-        currentPoint = z
-        currentCost = 0
-        while len(checkPoints) > 0:
-            # print("-CURRENT POINTS-")
-            # print(checkPoints)
-            # print(currentPoint)
-            checkPoints.remove(currentPoint)
-            # Check every predecessor in currentPoint
+        Store this somewhere.
+        This is Dijkstra's algorithm, run backwards from z over the
+        predecessors.  The frontier is a binary heap of (cost, node); a node
+        whose cost decreases is pushed again, rather than moved in the heap,
+        and the outdated entries are skipped when popped.  Each node is
+        settled (its cost made final) once, when first popped, and the
+        nodes that cannot reach z are never visited.  When the cost of a
+        node decreases, the node it goes through is recorded as its next
+        hop towards z.
+        The result is a PathTree, which is cached: see cache_tree."""
+        if z in self.trees:
+            self.trees.move_to_end(z)
+            self.cache_hits += 1
+            self.tree = self.trees[z]
+        elif self.frozen is not None:
+            self.tree = self.compute_frozen_cost(z)
+            self.cache_tree(self.tree)
+        else:
+            self.tree = self.compute_dict_cost(z)
+            self.cache_tree(self.tree)
+        self.pointCost = self.tree.cost
+
+    def compute_dict_cost(self, z):
+        """Dijkstra's algorithm over the dictionaries s, p and c."""
+        pointCost = {z: 0}
+        nextHop = {}
+        settled = set()
+        # The counter breaks ties, so that nodes are never compared.
+        counter = itertools.count()
+        frontier = [(0, next(counter), z)]
+        while frontier:
+            currentCost, _, currentPoint = heapq.heappop(frontier)
+            if currentPoint in settled:
+                continue
+            settled.add(currentPoint)
+            for predecessor in self.p[currentPoint]:
+                if predecessor in settled:
+                    continue
+                newCost = currentCost + self.c[(predecessor, currentPoint)]
+                if newCost < pointCost.get(predecessor, INFINITY):
+                    pointCost[predecessor] = newCost
+                    nextHop[predecessor] = currentPoint
+                    heapq.heappush(frontier,
+                                   (newCost, next(counter), predecessor))
+        return PathTree(z, pointCost, nextHop)
+
+    def cache_tree(self, tree):
+        """Caches a PathTree, evicting the least recently used trees while
+        the cache is over budget.  The newest tree is always kept."""
+        z = tree.target
+        size = tree.nbytes()
+        self.trees[z] = tree
+        self.tree_bytes[z] = size
+        self.cache_bytes += size
+        while self.cache_bytes > self.cache_budget and len(self.trees) > 1:
+            old, _ = self.trees.popitem(last=False)
+            self.cache_bytes -= self.tree_bytes.pop(old)
+
+    def clear_cache(self):
+        self.trees.clear()
+        self.tree_bytes.clear()
+        self.cache_bytes = 0
+
+    def repair_trees(self, x, y, old, new):
+        """Repairs the cached trees, and the last one computed, after the
+        cost of the edge from x to y went from old to new (either may be
+        infinite, for a missing edge)."""
+        trees = list(self.trees.values())
+        if self.tree is not None and self.tree.target not in self.trees:
+            trees.append(self.tree)
+        for tree in trees:
+            self.repair_tree(tree, x, y, old, new)
+            if tree.target in self.trees:
+                size = tree.nbytes()
+                self.cache_bytes += size - self.tree_bytes[tree.target]
+                self.tree_bytes[tree.target] = size
+        while self.cache_bytes > self.cache_budget and len(self.trees) > 1:
+            old, _ = self.trees.popitem(last=False)
+            self.cache_bytes -= self.tree_bytes.pop(old)
+
+    def repair_tree(self, tree, x, y, old, new):
+        """Updates a PathTree after a change in the cost of the edge from x to
+        y, touching only the nodes whose cost changes, in the manner of
+        Ramalingam and Reps.
+        If the edge got cheaper, the cost of x may decrease, and the
+        decrease is propagated backwards by a Dijkstra search from x that
+        only continues through nodes that improve.
+        If the edge got dearer, or was removed, only the nodes whose
+        cheapest path used it are affected: x, and the nodes whose next
+        hops lead to x.  Each of them first gets the best cost through its
+        successors outside the affected nodes, and a Dijkstra search
+        among the affected nodes then settles their final costs; those
+        that are not reached can no longer reach the target."""
+        cost, nextHop = tree.cost, tree.next_hop
+        if x == y or x == tree.target:
+            return
+        counter = itertools.count()
+        frontier = []
+        if new < old:
+            if y not in cost or cost[y] + new >= cost.get(x, INFINITY):
+                return
+            cost[x] = cost[y] + new
+            nextHop[x] = y
+            frontier.append((cost[x], next(counter), x))
+            while frontier:
+                currentCost, _, currentPoint = heapq.heappop(frontier)
+                if currentCost > cost[currentPoint]:
+                    continue
+                for predecessor in self.p[currentPoint]:
+                    newCost = currentCost + self.c[(predecessor, currentPoint)]
+                    if newCost < cost.get(predecessor, INFINITY):
+                        cost[predecessor] = newCost
+                        nextHop[predecessor] = currentPoint
+                        heapq.heappush(frontier,
+                                       (newCost, next(counter), predecessor))
+            return
+        if new == old or nextHop.get(x) != y:
+            return
+        # The affected nodes: those whose next hops lead to x.
+        affected = {x}
+        stack = [x]
+        while stack:
+            v = stack.pop()
+            for u in self.p[v]:
+                if u not in affected and nextHop.get(u) == v:
+                    affected.add(u)
+                    stack.append(u)
+        for u in affected:
+            del cost[u]
+            del nextHop[u]
+        for u in affected:
+            best, hop = INFINITY, None
+            for v in self.s[u]:
+                if v in affected or v not in cost:
+                    continue
+                if cost[v] + self.c[(u, v)] < best:
+                    best, hop = cost[v] + self.c[(u, v)], v
+            if hop is not None:
+                cost[u] = best
+                nextHop[u] = hop
+                frontier.append((best, next(counter), u))
+        heapq.heapify(frontier)
+        settled = set()
+        while frontier:
+            currentCost, _, currentPoint = heapq.heappop(frontier)
+            if currentPoint in settled:
+                continue
+            settled.add(currentPoint)
             for predecessor in self.p[currentPoint]:
-                costLengthAdd = self.c[(predecessor, currentPoint)]
-                # Change cost if it there is a cheaper option
-                if self.pointCost[predecessor] > (currentCost + costLengthAdd):
-                    self.pointCost[predecessor] = currentCost + costLengthAdd
-                    if predecessor not in checkPoints:
-                        checkPoints.append(predecessor)
-
-            if len(checkPoints) != 0:
-                currentPoint = checkPoints[0]
-                currentCost = self.pointCost[currentPoint]
-
-        # print("-----COMPUTING COSTS-----")
-        # print("Point Costs")
-        # print(self.pointCost)
-
-    def cost(self, x):
+                if predecessor not in affected or predecessor in settled:
+                    continue
+                newCost = currentCost + self.c[(predecessor, currentPoint)]
+                if newCost < cost.get(predecessor, INFINITY):
+                    cost[predecessor] = newCost
+                    nextHop[predecessor] = currentPoint
+                    heapq.heappush(frontier,
+                                   (newCost, next(counter), predecessor))
+
+    def compute_frozen_cost(self, z):
+        """The same Dijkstra, over the arrays of the FrozenGraph: nodes are
+        numbers.  Only the edges of the settled nodes are read, one slice
+        of the arrays per node, so a query costs time and memory in
+        proportion to the part of the graph it reaches, and arrays mapped
+        from a graph file are not copied."""
+        frozen = self.frozen
+        if z not in frozen.index:
+            return PathTree(z, {z: 0}, {})
+        offsets = frozen.reverse_offsets
+        sources = frozen.sources
+        costs = frozen.reverse_costs
+        start = frozen.index[z]
+        pointCost = {start: 0}
+        nextHop = {}
+        settled = set()
+        frontier = [(0, start)]
+        while frontier:
+            currentCost, currentPoint = heapq.heappop(frontier)
+            if currentPoint in settled:
+                continue
+            settled.add(currentPoint)
+            begin, end = offsets[currentPoint], offsets[currentPoint + 1]
+            for predecessor, edgeCost in zip(sources[begin:end].tolist(),
+                                             costs[begin:end].tolist()):
+                newCost = currentCost + edgeCost
+                if newCost < pointCost.get(predecessor, INFINITY):
+                    pointCost[predecessor] = newCost
+                    nextHop[predecessor] = currentPoint
+                    heapq.heappush(frontier, (newCost, predecessor))
+        return PathTree(
+            z, dict(zip(frozen.node_list(pointCost), pointCost.values())),
+            dict(zip(frozen.node_list(nextHop),
+                     frozen.node_list(nextHop.values()))))
+
+    def successors(self, x):
+        """Returns the successors of x, with the costs of the edges to them,
+        as a list of pairs."""
+        if self.frozen is None:
+            return [(y, self.c[(x, y)]) for y in self.s[x]]
+        frozen = self.frozen
+        if x not in frozen.index:
+            return []
+        i = frozen.index[x]
+        begin, end = frozen.offsets[i], frozen.offsets[i + 1]
+        return list(zip(frozen.node_list(frozen.targets[begin:end].tolist()),
+                        frozen.costs[begin:end].tolist()))
+
+    def predecessors(self, x):
+        """Returns the predecessors of x, with the costs of the edges from
+        them, as a list of pairs."""
+        if self.frozen is None:
+            return [(y, self.c[(y, x)]) for y in self.p[x]]
+        frozen = self.frozen
+        if x not in frozen.index:
+            return []
+        i = frozen.index[x]
+        begin, end = frozen.reverse_offsets[i], frozen.reverse_offsets[i + 1]
+        return list(zip(frozen.node_list(frozen.sources[begin:end].tolist()),
+                        frozen.reverse_costs[begin:end].tolist()))
+
+    def bidirectional_search(self, w, z, heuristic=None):
+        """Finds a cheapest path from w to z by running Dijkstra's algorithm
+        forwards from w and backwards from z at the same time, expanding
+        the smaller frontier first, until the two searches meet.  Returns
+        the pair (cost, path), or (INFINITY, None) if there is no path.
+        If heuristic is given, heuristic(x, y) must be a lower bound on the
+        cost of going from x to y, and a consistent one: heuristic(x, y) is
+        at most the cost of an edge from x to u plus heuristic(u, y)
+        (straight-line distances between coordinates are).  The search is
+        then A*, guided in both directions by the average of the bounds
+        from w and to z, and explores even fewer nodes."""
+        if w == z:
+            self.settled = 0
+            return 0, [w]
+        if heuristic is None:
+            potential = None
+        else:
+            def potential(x):
+                return (heuristic(x, z) - heuristic(w, x)) / 2
+        # Index 0 is the forward search, and 1 the backward one.  The keys
+        # are the costs plus the potential forwards, and minus it backwards.
+        sign = (1, -1)
+        pointCost = ({w: 0}, {z: 0})
+        parent = ({w: None}, {z: None})
+        settled = (set(), set())
+        neighbours = (self.successors, self.predecessors)
+        counter = itertools.count()
+        frontiers = ([(0 if potential is None else potential(w),
+                       next(counter), w)],
+                     [(0 if potential is None else -potential(z),
+                       next(counter), z)])
+        best, meeting = INFINITY, None
+        while frontiers[0] and frontiers[1]:
+            # No path through an unsettled node can beat best any more.
+            if frontiers[0][0][0] + frontiers[1][0][0] >= best:
+                break
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            _, _, currentPoint = heapq.heappop(frontiers[side])
+            if currentPoint in settled[side]:
+                continue
+            settled[side].add(currentPoint)
+            costs, otherCosts = pointCost[side], pointCost[1 - side]
+            currentCost = costs[currentPoint]
+            for neighbour, edgeCost in neighbours[side](currentPoint):
+                newCost = currentCost + edgeCost
+                if newCost < costs.get(neighbour, INFINITY):
+                    costs[neighbour] = newCost
+                    parent[side][neighbour] = currentPoint
+                    key = newCost
+                    if potential is not None:
+                        key += sign[side] * potential(neighbour)
+                    heapq.heappush(frontiers[side],
+                                   (key, next(counter), neighbour))
+                    if neighbour in otherCosts and \
+                            newCost + otherCosts[neighbour] < best:
+                        best = newCost + otherCosts[neighbour]
+                        meeting = neighbour
+        self.settled = len(settled[0]) + len(settled[1])
+        if meeting is None:
+            return INFINITY, None
+        path = []
+        x = meeting
+        while x is not None:
+            path.append(x)
+            x = parent[0][x]
+        path.reverse()
+        x = parent[1][meeting]
+        while x is not None:
+            path.append(x)
+            x = parent[1][x]
+        return best, path
+
+    def contraction_hierarchy(self):
+        """Returns the ContractionHierarchy of the graph, built on the first
+        call, and kept until an edge changes."""
+        if self.hierarchy is None:
+            self.hierarchy = ContractionHierarchy(self)
+        return self.hierarchy
+
+    def cost_matrix(self, sources, targets, workers=None, hierarchy=False):
+        """Returns the NumPy matrix of the costs of going from each of
+        sources (rows) to each of targets (columns), infinite where there is
+        no path.  One Dijkstra search is run from each source, forwards, or
+        from each target, backwards, whichever is fewer, and it stops as
+        soon as it has settled all the nodes at the other end, instead of
+        computing a whole tree.  These searches share no work: each row
+        costs a truncated search.  If workers is more than 1, the searches
+        are shared among that many processes, which map the FrozenGraph
+        arrays from shared memory instead of receiving pickled copies.
+        If hierarchy is True, or the contraction_hierarchy of the graph has
+        already been built, the matrix is computed by its cost_matrix
+        instead, with buckets: one upward search per source and per target,
+        which share the rest of the work.  Building the hierarchy takes
+        much longer than a few searches, but it is kept for later matrices
+        until an edge changes."""
+        sources = list(sources)
+        targets = list(targets)
+        if hierarchy or self.hierarchy is not None:
+            return self.contraction_hierarchy().cost_matrix(sources, targets)
+        frozen = self.snapshot()
+        forward = len(sources) <= len(targets)
+        starts, goals = (sources, targets) if forward else (targets, sources)
+        starts = [frozen.index.get(x, -1) for x in starts]
+        goals = [frozen.index.get(x, -1) for x in goals]
+        if forward:
+            arrays = (frozen.offsets, frozen.targets, frozen.costs)
+        else:
+            arrays = (frozen.reverse_offsets, frozen.sources,
+                      frozen.reverse_costs)
+        if workers is None or workers <= 1 or len(starts) <= 1:
+            rows = search_rows(*arrays, starts, goals)
+        else:
+            rows = parallel_search_rows(arrays, starts, goals, workers)
+        matrix = np.array(rows, dtype=np.float64).reshape(len(starts),
+                                                          len(goals))
+        if not forward:
+            matrix = matrix.T
+        # A node that has no edge still reaches itself.
+        for i, x in enumerate(sources):
+            for j, y in enumerate(targets):
+                if x == y:
+                    matrix[i, j] = 0
+        return matrix
+
+    def cost(self, x, z=None):
         """Returns the cost of going from x to z.  You should have stored this
-        cost somewhere in the above method compute_cost, for every x."""
+        cost somewhere in the above method compute_cost, for every x.
+        If z is given, the cost to z is returned, computing it if needed;
+        otherwise, it is the cost to the target of the last compute_cost."""
         # YOUR CODE HERE
-        return self.pointCost[x]
+        if z is not None:
+            self.compute_cost(z)
+        return self.pointCost.get(x, INFINITY)
 
-    def cheapest_path(self, w, z):
+    def path_tree(self, z):
+        """Returns the PathTree of the cheapest paths to z, which answers
+        queries from any source."""
+        self.compute_cost(z)
+        return self.tree
+
+    def cheapest_path(self, w, z, mode="tree", heuristic=None):
         """Returns the cheapest path from w to z, as a list beginning with w
         and ending with z.  Note: you need to call self.cost(z) first thing
         inside the implementation of this method.  If you CANNOT reach z,
-        which is indicated by w having infinite cost, return None."""
+        which is indicated by w having infinite cost, return None.
+        In "tree" mode, the path follows the next hops recorded by
+        compute_cost, in time proportional to its length.  In
+        "bidirectional" mode, only this path is searched for, with
+        bidirectional_search (A* if a heuristic is given), and nothing is
+        cached: this is faster for a single query on a large graph."""
         # YOUR CODE HERE
-        self.compute_cost(z)
+        assert mode in ("tree", "bidirectional"), \
+            "Unknown mode: {}".format(mode)
+        if mode == "bidirectional":
+            return self.bidirectional_search(w, z, heuristic)[1]
+        return self.path_tree(z).path(w)
 
-        path = []
-        currentPoint = w
-        isPathComplete = False
+    def save(self, path):
+        """Saves the graph to path, as a graph file (see write_graph)."""
+        write_graph(path, self)
 
-        if self.pointCost[w] == INFINITY or self.pointCost[z] == INFINITY:
-            return None
+    @staticmethod
+    def load(path):
+        """Returns the graph saved in path, mapped in memory (see
+        read_graph)."""
+        return read_graph(path)
+
+
+class ContractionHierarchy(object):
+    """A contraction hierarchy over a PricedGraph, for fast point-to-point
+    queries.  The nodes are contracted one at a time, cheapest first: a
+    contracted node is removed, and a shortcut edge u -> w is added for
+    each path u -> v -> w through it that no other path (a witness) can
+    replace.  The order in which the nodes are contracted is their rank.
+    A query then runs a bidirectional Dijkstra that only goes up in rank:
+    forwards from the source over up, and backwards from the target over
+    down.  Both searches meet at the highest node of a cheapest path; on
+    road-like graphs, they settle a tiny fraction of the nodes.
+    Nodes are numbered as in nodes; up[u] holds the pairs (w, cost) of
+    the edges from u to higher nodes, down[u] those of the edges from
+    higher nodes w to u, and middle[(u, w)] is the node that the shortcut
+    u -> w skips."""
+
+    def __init__(self, graph=None, witness_limit=64):
+        """Builds the hierarchy of graph, a PricedGraph, if given.  Witness
+        searches settle at most witness_limit nodes each: a higher limit
+        avoids more useless shortcuts, but takes longer."""
+        self.nodes = []
+        self.index = {}
+        self.rank = []
+        self.up = []
+        self.down = []
+        self.middle = {}
+        self.settled = 0  # Nodes settled by the last query.
+        if graph is not None:
+            self.build(graph, witness_limit)
+
+    def build(self, graph, witness_limit=64):
+        if graph.frozen is not None:
+            edges = graph.frozen.edges()
+        else:
+            edges = ((x, y, c) for (x, y), c in graph.c.items())
+        edges = list(edges)
+        self.nodes = list({x for x, _, _ in edges} | {y for _, y, _ in edges})
+        self.index = {x: i for i, x in enumerate(self.nodes)}
+        n = len(self.nodes)
+        # The edges between the nodes not contracted yet, both ways.
+        out = [{} for _ in range(n)]
+        into = [{} for _ in range(n)]
+        for x, y, c in edges:
+            i, j = self.index[x], self.index[y]
+            if i != j and c < out[i].get(j, INFINITY):
+                out[i][j] = c
+                into[j][i] = c
+        self.rank = [0] * n
+        self.up = [None] * n
+        self.down = [None] * n
+        self.middle = {}
+        deleted = [0] * n  # Number of contracted neighbours.
+        depth = [0] * n  # Longest chain of contracted nodes below.
 
-        while not isPathComplete:
-            path.append(currentPoint)
-            if currentPoint == z:
-                isPathComplete = True
-                break;
-            pointCost = self.pointCost[currentPoint]
-            for successor in self.s[currentPoint]:
-                currentCost = self.c[(currentPoint, successor)]
-                if currentCost != INFINITY and ((pointCost - currentCost) == self.pointCost[successor]):
-                    currentPoint = successor
-                    break;
+        def priority(v):
+            # Mostly the edge difference (shortcuts added, minus edges
+            # removed); the deleted neighbours and the depth spread the
+            # contraction evenly over the graph.
+            shortcuts = self.shortcuts(v, out, into, witness_limit)
+            return (2 * (len(shortcuts) - len(out[v]) - len(into[v])) +
+                    deleted[v] + depth[v], shortcuts)
+
+        current = [priority(v)[0] for v in range(n)]
+        queue = [(p, v) for v, p in enumerate(current)]
+        heapq.heapify(queue)
+        order = 0
+        while queue:
+            p, v = heapq.heappop(queue)
+            if out[v] is None or p != current[v]:
+                # Contracted, or an outdated entry.
+                continue
+            # Priorities change as other nodes are contracted: they are
+            # updated for the neighbours of each contracted node, and
+            # checked again when a node comes out first.
+            p, shortcuts = priority(v)
+            if queue and p > queue[0][0]:
+                current[v] = p
+                heapq.heappush(queue, (p, v))
+                continue
+            self.rank[v] = order
+            order += 1
+            self.up[v] = list(out[v].items())
+            self.down[v] = list(into[v].items())
+            for u in into[v]:
+                del out[u][v]
+                deleted[u] += 1
+            for w in out[v]:
+                del into[w][v]
+                deleted[w] += 1
+            for u, w, c in shortcuts:
+                if c < out[u].get(w, INFINITY):
+                    out[u][w] = c
+                    into[w][u] = c
+                    self.middle[(u, w)] = v
+            neighbours = set(out[v]) | set(into[v])
+            out[v] = into[v] = None
+            for x in neighbours:
+                depth[x] = max(depth[x], depth[v] + 1)
+                current[x] = priority(x)[0]
+                heapq.heappush(queue, (current[x], x))
+
+    @staticmethod
+    def shortcuts(v, out, into, witness_limit):
+        """Returns the shortcuts (u, w, cost) needed to contract v: one for
+        each path u -> v -> w for which a Dijkstra search from u, avoiding
+        v, finds nothing cheaper."""
+        result = []
+        for u, uv in into[v].items():
+            targets = {w: uv + vw for w, vw in out[v].items() if w != u}
+            if not targets:
+                continue
+            limit = max(targets.values())
+            pointCost = {u: 0}
+            settled = set()
+            unsettled = len(targets)
+            frontier = [(0, u)]
+            while frontier and unsettled and len(settled) < witness_limit:
+                currentCost, x = heapq.heappop(frontier)
+                if x in settled:
+                    continue
+                if currentCost > limit:
+                    break
+                settled.add(x)
+                if x in targets:
+                    unsettled -= 1
+                for y, c in out[x].items():
+                    newCost = currentCost + c
+                    if y != v and newCost < pointCost.get(y, INFINITY):
+                        pointCost[y] = newCost
+                        heapq.heappush(frontier, (newCost, y))
+            for w, c in targets.items():
+                if pointCost.get(w, INFINITY) > c:
+                    result.append((u, w, c))
+        return result
+
+    def query(self, w, z):
+        """Returns the pair (cost, path) of a cheapest path from w to z, or
+        (INFINITY, None) if there is none.  The path is that of the
+        hierarchy, with the shortcuts unpacked."""
+        self.settled = 0
+        if w == z:
+            return 0, [w]
+        if w not in self.index or z not in self.index:
+            return INFINITY, None
+        s, t = self.index[w], self.index[z]
+        pointCost = ({s: 0}, {t: 0})
+        parent = ({s: None}, {t: None})
+        settled = (set(), set())
+        edges = (self.up, self.down)
+        frontiers = ([(0, s)], [(0, t)])
+        best, meeting = INFINITY, None
+        side = 0
+        while True:
+            # Each search stops once its next node costs at least best.
+            active = [i for i in (0, 1)
+                      if frontiers[i] and frontiers[i][0][0] < best]
+            if not active:
+                break
+            side = active[0] if len(active) == 1 else 1 - side
+            currentCost, x = heapq.heappop(frontiers[side])
+            if x in settled[side]:
+                continue
+            settled[side].add(x)
+            costs = pointCost[side]
+            otherCosts = pointCost[1 - side]
+            if x in otherCosts and currentCost + otherCosts[x] < best:
+                best = currentCost + otherCosts[x]
+                meeting = x
+            for y, c in edges[side][x]:
+                newCost = currentCost + c
+                if newCost < costs.get(y, INFINITY):
+                    costs[y] = newCost
+                    parent[side][y] = x
+                    heapq.heappush(frontiers[side], (newCost, y))
+        self.settled = len(settled[0]) + len(settled[1])
+        if meeting is None:
+            return INFINITY, None
+        hops = []
+        x = meeting
+        while x is not None:
+            hops.append(x)
+            x = parent[0][x]
+        hops.reverse()
+        x = parent[1][meeting]
+        while x is not None:
+            hops.append(x)
+            x = parent[1][x]
+        return best, [self.nodes[i] for i in self.unpack(hops)]
+
+    def unpack(self, hops):
+        """Replaces the shortcuts between consecutive hops by the paths they
+        stand for."""
+        path = [hops[0]]
+        for u, w in zip(hops, hops[1:]):
+            stack = [(u, w)]
+            while stack:
+                u, w = stack.pop()
+                v = self.middle.get((u, w))
+                if v is None:
+                    path.append(w)
+                else:
+                    stack.append((v, w))
+                    stack.append((u, v))
         return path
+
+    def cost(self, w, z):
+        return self.query(w, z)[0]
+
+    def upward_search(self, start, edges):
+        """Returns the costs from (or to) node number start, going up the
+        hierarchy over edges (self.up or self.down)."""
+        pointCost = {start: 0}
+        settled = set()
+        frontier = [(0, start)]
+        while frontier:
+            currentCost, x = heapq.heappop(frontier)
+            if x in settled:
+                continue
+            settled.add(x)
+            for y, c in edges[x]:
+                newCost = currentCost + c
+                if newCost < pointCost.get(y, INFINITY):
+                    pointCost[y] = newCost
+                    heapq.heappush(frontier, (newCost, y))
+        return pointCost
+
+    def cost_matrix(self, sources, targets):
+        """Returns the NumPy matrix of the costs from each of sources (rows)
+        to each of targets (columns), with buckets: the upward searches
+        backwards from the targets leave, at each node they reach, a
+        bucket entry (target, cost); then the upward search from each
+        source meets all the targets at once, through the buckets of the
+        nodes it reaches.  This takes one upward search per source and per
+        target, instead of one query per pair."""
+        sources = list(sources)
+        targets = list(targets)
+        matrix = np.full((len(sources), len(targets)), INFINITY)
+        buckets = defaultdict(list)
+        for j, z in enumerate(targets):
+            if z in self.index:
+                for x, c in self.upward_search(self.index[z],
+                                               self.down).items():
+                    buckets[x].append((j, c))
+        for i, w in enumerate(sources):
+            if w not in self.index:
+                continue
+            row = matrix[i].tolist()
+            for x, c in self.upward_search(self.index[w], self.up).items():
+                for j, d in buckets.get(x, ()):
+                    if c + d < row[j]:
+                        row[j] = c + d
+            matrix[i] = row
+        for i, w in enumerate(sources):
+            for j, z in enumerate(targets):
+                if w == z:
+                    matrix[i, j] = 0
+        return matrix
+
+    def cheapest_path(self, w, z):
+        return self.query(w, z)[1]
+
+    def save(self, path):
+        """Saves the hierarchy to path, a NumPy .npz file.  The nodes are
+        pickled, so that any node a PricedGraph accepts can be saved."""
+        arrays = {"nodes": np.array(self.nodes + [None], dtype=object)[:-1],
+                  "rank": np.array(self.rank, dtype=np.int64)}
+        for name in ("up", "down"):
+            lists = getattr(self, name)
+            offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+            np.cumsum([len(l) for l in lists], out=offsets[1:])
+            arrays[name + "_offsets"] = offsets
+            arrays[name + "_targets"] = np.array(
+                [y for l in lists for y, _ in l], dtype=np.int64)
+            arrays[name + "_costs"] = np.array(
+                [c for l in lists for _, c in l], dtype=np.float64)
+        arrays["middle"] = np.array(
+            [(u, w, v) for (u, w), v in self.middle.items()],
+            dtype=np.int64).reshape(-1, 3)
+        np.savez(path, **arrays)
+
+    @staticmethod
+    def load(path):
+        """Returns the hierarchy saved in path by save."""
+        hierarchy = ContractionHierarchy()
+        with np.load(path, allow_pickle=True) as arrays:
+            hierarchy.nodes = arrays["nodes"].tolist()
+            hierarchy.index = {x: i for i, x in enumerate(hierarchy.nodes)}
+            hierarchy.rank = arrays["rank"].tolist()
+            for name in ("up", "down"):
+                offsets = arrays[name + "_offsets"].tolist()
+                pairs = list(zip(arrays[name + "_targets"].tolist(),
+                                 arrays[name + "_costs"].tolist()))
+                setattr(hierarchy, name,
+                        [pairs[offsets[i]:offsets[i + 1]]
+                         for i in range(len(offsets) - 1)])
+            hierarchy.middle = {(u, w): v
+                                for u, w, v in arrays["middle"].tolist()}
+        return hierarchy
+
+
+# Graph files.  A graph file holds a FrozenGraph, so that it can be mapped
+# in memory and used as it is: a header (GRAPH_HEADER, padded to
+# GRAPH_HEADER_SIZE bytes), then the node table, then the arrays offsets,
+# targets, costs, reverse_offsets, sources and reverse_costs, each padded
+# to a multiple of 8 bytes.  All numbers are little-endian; offsets are
+# int64, node numbers int32, and costs float64.  The nodes are sorted, so
+# that a node is found by binary search; the node table is either an
+# int64 array (kind 0), or, for strings (kind 1), an int64 array of n + 1
+# offsets into the UTF-8 names that follow it.
+
+GRAPH_MAGIC = b"PGRAPH\x00\x01"
+# Magic, node kind, reserved, nodes, edges, bytes of the names.
+GRAPH_HEADER = struct.Struct("<8sIIQQQ")
+GRAPH_HEADER_SIZE = 64
+
+
+class NodeTable(object):
+    """The sorted nodes of a graph file, read from the file on access.  It
+    serves both as the nodes of a FrozenGraph (table[i] is node i) and as
+    its index (table.get(x) is the number of node x), without building a
+    list or dictionary of all the nodes."""
+
+    def __init__(self, keys=None, name_offsets=None, names=None):
+        """Either keys is the array of integer nodes, or name_offsets and
+        names give the UTF-8 names of string nodes."""
+        self.keys = keys
+        self.name_offsets = name_offsets
+        self.names = names
+
+    def __len__(self):
+        if self.keys is not None:
+            return len(self.keys)
+        return len(self.name_offsets) - 1
+
+    def __getitem__(self, i):
+        if self.keys is not None:
+            return int(self.keys[i])
+        return self.name(i).decode()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, numbers):
+        """Returns the list of the nodes numbered numbers."""
+        if self.keys is not None:
+            return self.keys[np.fromiter(numbers, dtype=np.int64)].tolist()
+        return [self[i] for i in numbers]
+
+    def name(self, i):
+        return bytes(self.names[self.name_offsets[i]:self.name_offsets[i + 1]])
+
+    def get(self, x, default=None):
+        """Returns the number of node x, or default if there is none."""
+        if self.keys is not None:
+            if not isinstance(x, int):
+                return default
+            i = int(np.searchsorted(self.keys, x))
+            if i < len(self.keys) and self.keys[i] == x:
+                return i
+            return default
+        if not isinstance(x, str):
+            return default
+        key = x.encode()
+        i = bisect.bisect_left(NameKeys(self), key)
+        if i < len(self) and self.name(i) == key:
+            return i
+        return default
+
+    def __contains__(self, x):
+        return self.get(x) is not None
+
+    def index(self, x):
+        i = self.get(x)
+        if i is None:
+            raise KeyError(x)
+        return i
+
+
+class NameKeys(object):
+    """The names of a NodeTable as a sequence of bytes, for bisect."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+        return self.table.name(i)
+
+
+class NodeIndex(object):
+    """The index of a FrozenGraph read from a file: node -> number."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, x):
+        return self.table.index(x)
+
+    def __contains__(self, x):
+        return x in self.table
+
+    def get(self, x, default=None):
+        return self.table.get(x, default)
+
+
+def write_graph(path, graph):
+    """Writes a PricedGraph to path, as a graph file.  The nodes must be
+    all integers, or all strings."""
+    frozen = graph.snapshot()
+    x = np.repeat(np.arange(len(frozen), dtype=np.int32),
+                  np.diff(frozen.offsets))
+    write_edges(path, list(frozen.nodes), x, frozen.targets, frozen.costs)
+
+
+def write_edges(path, nodes, x, y, costs):
+    """Writes a graph file, with nodes, and edges from nodes[x[k]] to
+    nodes[y[k]] at costs[k]."""
+    n = len(nodes)
+    if all(isinstance(v, int) for v in nodes):
+        kind = 0
+        keys = np.array(nodes, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+    else:
+        assert all(isinstance(v, str) for v in nodes), \
+            "Nodes must be all integers, or all strings."
+        kind = 1
+        encoded = [v.encode() for v in nodes]
+        order = np.array(sorted(range(n), key=encoded.__getitem__),
+                         dtype=np.int64)
+    # Renumbers the nodes in sorted order.
+    rank = np.empty(n, dtype=np.int32)
+    rank[order] = np.arange(n, dtype=np.int32)
+    x = rank[np.asarray(x, dtype=np.int64)]
+    y = rank[np.asarray(y, dtype=np.int64)]
+    costs = np.asarray(costs, dtype=np.float64)
+    arrays = csr(n, x, y, costs) + csr(n, y, x, costs)
+    if kind == 0:
+        table = [keys[order]]
+        name_bytes = 0
+    else:
+        names = b"".join(encoded[i] for i in order)
+        name_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(encoded[i]) for i in order], out=name_offsets[1:])
+        table = [name_offsets, np.frombuffer(names, dtype=np.uint8)]
+        name_bytes = len(names)
+    with open(path, "wb") as f:
+        f.write(GRAPH_HEADER.pack(GRAPH_MAGIC, kind, 0, n, len(costs),
+                                  name_bytes).ljust(GRAPH_HEADER_SIZE, b"\0"))
+        for a in table + list(arrays):
+            data = np.ascontiguousarray(a).astype(a.dtype.newbyteorder("<"),
+                                                  copy=False).tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+
+
+def read_graph(path):
+    """Returns the PricedGraph of the graph file in path, frozen, with its
+    arrays mapped in memory rather than read: this takes about the same
+    time whatever the size of the graph, and processes that map the same
+    file share its pages."""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, kind, _, n, m, name_bytes = GRAPH_HEADER.unpack_from(buffer, 0)
+    assert magic == GRAPH_MAGIC, "Not a graph file: {}".format(path)
+    position = GRAPH_HEADER_SIZE
+    def take(dtype, count):
+        nonlocal position
+        a = np.frombuffer(buffer, dtype=dtype, count=count, offset=position)
+        position += a.nbytes + -a.nbytes % 8
+        return a
+    if kind == 0:
+        table = NodeTable(keys=take("<i8", n))
+    else:
+        name_offsets = take("<i8", n + 1)
+        table = NodeTable(name_offsets=name_offsets,
+                          names=take("u1", name_bytes))
+    arrays = (take("<i8", n + 1), take("<i4", m), take("<f8", m),
+              take("<i8", n + 1), take("<i4", m), take("<f8", m))
+    graph = PricedGraph()
+    graph.frozen = FrozenGraph.from_arrays(table, NodeIndex(table), arrays)
+    graph.frozen.buffer = buffer  # Keeps the mapping open.
+    graph.s = graph.p = graph.c = None
+    return graph
+
+
+def csv_to_graph(csv_path, path, delimiter=",", header=False,
+                 columns=(0, 1, 2)):
+    """Converts an edge list in CSV, with one edge per row, into a graph
+    file, without building a PricedGraph: the nodes are numbered in a
+    dictionary, and the edges collected in compact arrays.  columns gives
+    the positions of the source, target and cost; if header is True, the
+    first row is skipped.  Nodes are integers if they all read as
+    distinct integers, and strings otherwise.  Returns the numbers of
+    nodes and of (distinct) edges."""
+    index = {}
+    x = array("i")
+    y = array("i")
+    costs = array("d")
+    source, target, cost = columns
+    with open(csv_path, newline="") as f:
+        rows = csv.reader(f, delimiter=delimiter)
+        if header:
+            next(rows, None)
+        for row in rows:
+            if not row:
+                continue
+            c = float(row[cost])
+            assert c > 0, "Costs need to be strictly positive."
+            x.append(index.setdefault(row[source], len(index)))
+            y.append(index.setdefault(row[target], len(index)))
+            costs.append(c)
+    # As with add_edge, the last cost given for an edge is kept.
+    x = np.frombuffer(x, dtype=np.int32)
+    y = np.frombuffer(y, dtype=np.int32)
+    costs = np.frombuffer(costs, dtype=np.float64)
+    keys = (x.astype(np.int64) * len(index) + y)[::-1]
+    last = len(keys) - 1 - np.unique(keys, return_index=True)[1]
+    last.sort()
+    nodes = list(index)
+    try:
+        numbers = [int(v) for v in nodes]
+        if len(set(numbers)) == len(numbers):
+            nodes = numbers
+    except ValueError:
+        pass
+    write_edges(path, nodes, x[last], y[last], costs[last])
+    return len(nodes), len(last)
+
@@ -0,0 +1,231 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from SAT_Solver import SAT, UNKNOWN
+
+### Instance generators
+
+def random_ksat(num_vars, ratio, k=3, seed=None):
+    """Returns a random k-SAT instance with num_vars variables and
+    round(ratio * num_vars) clauses, each on k distinct variables."""
+    rng = random.Random(seed)
+    variables = range(1, num_vars + 1)
+    return [[v if rng.random() < 0.5 else -v for v in rng.sample(variables, k)]
+            for _ in range(round(ratio * num_vars))]
+
+
+def pigeonhole(holes):
+    """Returns the (unsatisfiable) CNF saying that holes + 1 pigeons fit in
+    holes holes, with at most one pigeon per hole."""
+    def var(pigeon, hole):
+        return pigeon * holes + hole + 1
+    clauses = [[var(p, h) for h in range(holes)] for p in range(holes + 1)]
+    for h in range(holes):
+        for p, q in itertools.combinations(range(holes + 1), 2):
+            clauses.append([-var(p, h), -var(q, h)])
+    return clauses
+
+
+def graph_colouring(num_nodes, edge_probability, colours, seed=None):
+    """Returns the CNF saying that a random graph (each edge present with
+    edge_probability) can be coloured with the given number of colours."""
+    rng = random.Random(seed)
+    def var(node, colour):
+        return node * colours + colour + 1
+    clauses = []
+    for n in range(num_nodes):
+        clauses.append([var(n, c) for c in range(colours)])
+        for c, d in itertools.combinations(range(colours), 2):
+            clauses.append([-var(n, c), -var(n, d)])
+    for n, m in itertools.combinations(range(num_nodes), 2):
+        if rng.random() < edge_probability:
+            for c in range(colours):
+                clauses.append([-var(n, c), -var(m, c)])
+    return clauses
+
+
+# The default benchmark suite: instance name -> (generator, arguments).
+FAMILIES = {
+    "random3-v100-r4.26-s1": (random_ksat, (100, 4.26, 3, 1)),
+    "random3-v150-r4.26-s2": (random_ksat, (150, 4.26, 3, 2)),
+    "random3-v300-r3.8-s3": (random_ksat, (300, 3.8, 3, 3)),
+    "random4-v60-r9.9-s4": (random_ksat, (60, 9.9, 4, 4)),
+    "pigeonhole-5": (pigeonhole, (5,)),
+    "pigeonhole-6": (pigeonhole, (6,)),
+    "colouring-n60-p0.13-c4-s5": (graph_colouring, (60, 0.13, 4, 5)),
+    "colouring-n40-p0.35-c6-s6": (graph_colouring, (40, 0.35, 6, 6)),
+}
+
+
+### Runner
+
+def measure(generator, arguments, options, results):
+    """Runs in a fresh process, so that the peak RSS is that of one
+    instance: generates the instance, solves it, and puts the measurements
+    on the results queue, or an error record if anything fails."""
+    start = time.perf_counter()
+    try:
+        clauses = generator(*arguments)
+        s = SAT(clauses)
+        start = time.perf_counter()
+        model = s.solve(**options)
+        elapsed = time.perf_counter() - start
+        if model not in (False, UNKNOWN):
+            assert s.verify_assignment(model), "Wrong model"
+    except Exception as e:
+        results.put({"status": "error", "error": repr(e),
+                     "time": time.perf_counter() - start})
+        return
+    if model is False:
+        status = "unsat"
+    elif model == UNKNOWN:
+        status = "unknown"
+    else:
+        status = "sat"
+    measurements = s.stats.as_dict()
+    measurements.update({
+        "status": status,
+        "time": elapsed,
+        "phase_time": measurements.pop("time"),
+        "peak_rss_kb": peak_rss_kb(),
+    })
+    results.put(measurements)
+
+
+def peak_rss_kb():
+    """Returns the peak RSS of this process, in kilobytes.  On Linux, it is
+    read from /proc, since ru_maxrss survives exec, and so would include
+    the peak of the process that started this one."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS.
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_instance(generator, arguments, options, timeout=None):
+    """Measures one instance in a child process; generator must be a
+    module-level function, to be sent to it.  Returns a dictionary of
+    measurements, whose status is "timeout" if it took too long, or
+    "error" as soon as the child fails or dies without measurements."""
+    # A forked child starts with the pages of the parent, and would count
+    # them in its peak RSS, so the child is spawned as a fresh interpreter.
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    p = context.Process(target=measure,
+                        args=(generator, arguments, options, results))
+    start = time.perf_counter()
+    p.start()
+    try:
+        while True:
+            try:
+                return results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+            if not p.is_alive():
+                # The child may have put its results just before exiting.
+                try:
+                    return results.get(timeout=0.1)
+                except queue.Empty:
+                    return {"status": "error",
+                            "time": time.perf_counter() - start}
+            if timeout is not None and time.perf_counter() - start > timeout:
+                return {"status": "timeout", "time": timeout}
+    finally:
+        p.terminate()
+        p.join()
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], check=True, capture_output=True,
+            text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(families=None, options=None, timeout=300):
+    """Runs every instance of families (by default, FAMILIES) with the given
+    SAT.solve options, and returns the results, ready to be saved as JSON."""
+    families = FAMILIES if families is None else families
+    options = options or {}
+    instances = {}
+    for name, (generator, arguments) in families.items():
+        instances[name] = run_instance(generator, arguments, options, timeout)
+    return {"commit": current_commit(), "options": options,
+            "instances": instances}
+
+
+def compare(old, new, tolerance=1.2, min_time=0.05):
+    """Compares two results of run_benchmarks.  Returns a list of
+    (instance, measure, old value, new value) for the measures that got
+    worse by more than the tolerance factor, or whose status changed.
+    Times below min_time seconds are too noisy to be compared."""
+    regressions = []
+    for name, before in old["instances"].items():
+        after = new["instances"].get(name)
+        if after is None:
+            continue
+        if before["status"] != after["status"]:
+            regressions.append((name, "status", before["status"],
+                                after["status"]))
+            continue
+        for measure in ("time", "decisions", "propagations", "conflicts",
+                        "flips", "peak_rss_kb"):
+            a, b = before.get(measure), after.get(measure)
+            if a is None or b is None:
+                continue
+            if measure == "time" and max(a, b) < min_time:
+                continue
+            if b > a * tolerance:
+                regressions.append((name, measure, a, b))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SAT solver benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the benchmark suite.")
+    run.add_argument("output", help="JSON file for the results.")
+    run.add_argument("--mode", default="cdcl")
+    run.add_argument("--timeout", type=float, default=300)
+    run.add_argument("--only", nargs="*", help="Instances to run.")
+    check = commands.add_parser("compare", help="Compare two results.")
+    check.add_argument("old")
+    check.add_argument("new")
+    check.add_argument("--tolerance", type=float, default=1.2)
+    args = parser.parse_args()
+    if args.command == "run":
+        families = FAMILIES
+        if args.only:
+            families = {name: FAMILIES[name] for name in args.only}
+        results = run_benchmarks(families, {"mode": args.mode}, args.timeout)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        for name, r in results["instances"].items():
+            print("{:32} {:8} {:9.3f}s".format(name, r["status"], r["time"]))
+    else:
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.tolerance)
+        for r in regressions:
+            print("{}: {} went from {} to {}".format(*r))
+        raise SystemExit(1 if regressions else 0)
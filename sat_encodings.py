@@ -0,0 +1,237 @@
+import itertools
+
+from SAT_Solver import SAT
+
+### Cardinality encodings
+
+ENCODINGS = ("sequential", "totalizer", "sorting")
+
+
+class CardinalityEncoder(object):
+    """Encodes cardinality constraints ("at most k of these literals are
+    true", and so on) into the clauses of a SAT instance, using auxiliary
+    variables numbered after the largest variable of the instance.  For
+    "at most k" of n literals, the "sequential" counter adds O(n k)
+    clauses, the "totalizer" about as many (fewer variables, though),
+    and the "sorting" network O(n log^2 n), instead of the C(n, k + 1)
+    clauses forbidding every subset of k + 1 literals.  All three
+    encodings are arc consistent: unit propagation falsifies the
+    remaining literals as soon as k are true."""
+
+    def __init__(self, sat, encoding="totalizer"):
+        """sat is the SAT instance receiving the clauses, through
+        add_clause.  Variables of the instance must be added before the
+        encoder is created, or at least not collide with the auxiliary
+        variables, which are numbered from num_variables + 1."""
+        assert encoding in ENCODINGS, \
+            "Unknown encoding: {}".format(encoding)
+        self.sat = sat
+        self.encoding = encoding
+        self.num_variables = max(map(abs, sat.arena.lits), default=0)
+        self.num_clauses = 0  # Number of clauses added by the encoder.
+
+    def new_variable(self):
+        self.num_variables += 1
+        return self.num_variables
+
+    def inputs(self, literals):
+        """Returns literals as a list, making sure that the auxiliary
+        variables come after their variables."""
+        literals = list(literals)
+        self.num_variables = max(self.num_variables,
+                                 max(map(abs, literals), default=0))
+        return literals
+
+    def add_clause(self, clause):
+        self.num_clauses += 1
+        self.sat.add_clause(clause)
+
+    def at_most(self, literals, k, encoding=None):
+        """Adds clauses stating that at most k of literals are true."""
+        literals = self.inputs(literals)
+        if k >= len(literals):
+            return
+        if k < 0:
+            self.add_clause([])
+            return
+        if k == 0:
+            for l in literals:
+                self.add_clause([-l])
+            return
+        encoding = encoding or self.encoding
+        assert encoding in ENCODINGS, \
+            "Unknown encoding: {}".format(encoding)
+        if encoding == "sequential":
+            self.sequential_counter(literals, k)
+        elif encoding == "totalizer":
+            outputs = self.totalizer(literals, k + 1, upward_only=True)
+            self.add_clause([-outputs[k]])
+        else:
+            outputs = self.sorting_network(literals)
+            self.add_clause([-outputs[k]])
+
+    def at_least(self, literals, k, encoding=None):
+        """Adds clauses stating that at least k of literals are true: at
+        most len(literals) - k of their negations are."""
+        literals = list(literals)
+        self.at_most([-l for l in literals], len(literals) - k, encoding)
+
+    def exactly(self, literals, k, encoding=None):
+        """Adds clauses stating that exactly k of literals are true."""
+        literals = list(literals)
+        self.at_most(literals, k, encoding)
+        self.at_least(literals, k, encoding)
+
+    def sequential_counter(self, literals, k):
+        """Sinz's sequential counter: the register s[i][j] is implied by
+        at least j + 1 of the first i + 1 literals being true, and the
+        (k + 1)-th true literal is forbidden."""
+        n = len(literals)
+        s = [[self.new_variable() for j in range(k)] for i in range(n - 1)]
+        for i, x in enumerate(literals):
+            if i < n - 1:
+                self.add_clause([-x, s[i][0]])
+            if i == 0:
+                continue
+            previous = s[i - 1]
+            self.add_clause([-x, -previous[k - 1]])
+            if i == n - 1:
+                break
+            for j in range(k):
+                self.add_clause([-previous[j], s[i][j]])
+                if j > 0:
+                    self.add_clause([-x, -previous[j - 1], s[i][j]])
+
+    def totalizer(self, literals, bound=None, upward_only=False):
+        """Bailleux and Boufkhad's totalizer: a binary tree of unary
+        counters over literals.  Returns the list of output literals,
+        where outputs[j] is true if at least j + 1 literals are; counting
+        stops at bound (by default, len(literals)).  Unless upward_only,
+        the converse implications are added too, so that the outputs can
+        be used both ways, for instance as assumptions tightening a bound
+        from one solve to the next."""
+        literals = self.inputs(literals)
+        bound = len(literals) if bound is None else min(bound, len(literals))
+        if len(literals) == 1:
+            return literals
+        middle = len(literals) // 2
+        left = self.totalizer(literals[:middle], bound, upward_only)
+        right = self.totalizer(literals[middle:], bound, upward_only)
+        outputs = [self.new_variable()
+                   for _ in range(min(bound, len(left) + len(right)))]
+        # a[i] is "at least i of the left literals", a[0] being true.
+        for i in range(len(left) + 1):
+            for j in range(len(right) + 1):
+                if 0 < i + j <= len(outputs):
+                    clause = [outputs[i + j - 1]]
+                    if i > 0:
+                        clause.append(-left[i - 1])
+                    if j > 0:
+                        clause.append(-right[j - 1])
+                    self.add_clause(clause)
+                if not upward_only and i + j < len(outputs):
+                    clause = [-outputs[i + j]]
+                    if i < len(left):
+                        clause.append(left[i])
+                    if j < len(right):
+                        clause.append(right[j])
+                    self.add_clause(clause)
+        return outputs
+
+    def sorting_network(self, literals):
+        """Batcher's odd-even merge sort, with half comparators: returns
+        the outputs, sorted from true to false, where outputs[j] is implied
+        by at least j + 1 of literals being true."""
+        size = 1
+        while size < len(literals):
+            size *= 2
+        # None stands for the constant false, which pads the inputs.
+        wires = list(literals) + [None] * (size - len(literals))
+        for lo, hi in batcher_pairs(size):
+            wires[lo], wires[hi] = self.comparator(wires[lo], wires[hi])
+        return wires[:len(literals)]
+
+    def comparator(self, a, b):
+        """Returns (a or b, a and b), or rather literals implied by them."""
+        if a is None or b is None:
+            return (b, None) if a is None else (a, None)
+        high, low = self.new_variable(), self.new_variable()
+        self.add_clause([-a, high])
+        self.add_clause([-b, high])
+        self.add_clause([-a, -b, low])
+        return high, low
+
+    def pb_at_most(self, literals, weights, bound):
+        """Adds clauses stating that the sum of the (positive integer)
+        weights of the true literals is at most bound, with the
+        generalized totalizer: each node of the tree has one output per
+        sum that its literals can reach, up to bound + 1."""
+        literals = self.inputs(literals)
+        weights = list(weights)
+        assert len(weights) == len(literals) and all(w > 0 for w in weights), \
+            "Weights must be positive, one per literal."
+        if sum(weights) <= bound:
+            return
+        if bound < 0:
+            self.add_clause([])
+            return
+        outputs = self.generalized_totalizer(
+            [(l, w) for l, w in zip(literals, weights)], bound + 1)
+        for total, o in outputs.items():
+            if total > bound:
+                self.add_clause([-o])
+
+    def generalized_totalizer(self, weighted, limit):
+        """Returns a dictionary from each reachable sum (capped at limit)
+        of the weighted literals to a literal implied by it."""
+        if len(weighted) == 1:
+            l, w = weighted[0]
+            return {min(w, limit): l}
+        middle = len(weighted) // 2
+        left = self.generalized_totalizer(weighted[:middle], limit)
+        right = self.generalized_totalizer(weighted[middle:], limit)
+        outputs = {}
+        def output(total):
+            total = min(total, limit)
+            if total not in outputs:
+                outputs[total] = self.new_variable()
+            return outputs[total]
+        for total, l in itertools.chain(left.items(), right.items()):
+            self.add_clause([-l, output(total)])
+        for (a, la), (b, lb) in itertools.product(left.items(),
+                                                  right.items()):
+            self.add_clause([-la, -lb, output(a + b)])
+        return outputs
+
+
+def batcher_pairs(size):
+    """Generates the comparators (lo, hi) of Batcher's odd-even merge sort
+    on size wires, size being a power of 2."""
+    p = 1
+    while p < size:
+        k = p
+        while k >= 1:
+            for j in range(k % p, size - k, 2 * k):
+                for i in range(min(k, size - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        yield i + j, i + j + k
+            k //= 2
+        p *= 2
+
+
+def sat_at_most(self, literals, k, encoding="totalizer"):
+    """Adds clauses stating that at most k of literals are true; see
+    CardinalityEncoder."""
+    CardinalityEncoder(self, encoding).at_most(literals, k)
+
+def sat_at_least(self, literals, k, encoding="totalizer"):
+    """Adds clauses stating that at least k of literals are true."""
+    CardinalityEncoder(self, encoding).at_least(literals, k)
+
+def sat_exactly(self, literals, k, encoding="totalizer"):
+    """Adds clauses stating that exactly k of literals are true."""
+    CardinalityEncoder(self, encoding).exactly(literals, k)
+
+SAT.at_most = sat_at_most
+SAT.at_least = sat_at_least
+SAT.exactly = sat_exactly